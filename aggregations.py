@@ -0,0 +1,174 @@
+# ZF Restaurantes – Agregações agrupadas
+# -------------------------------------------------------------
+# Motor de agregação: recebe uma chave de agrupamento e uma lista
+# declarativa de métricas e calcula todas a partir de um único
+# factorize da chave (bincount/unique do NumPy), devolvendo um
+# DataFrame "tidy" com uma linha por grupo e uma coluna por métrica.
+# -------------------------------------------------------------
+
+import operator
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cuisine_index import CuisineIndex
+from pricing import PRICE_COLUMN
+
+_OPS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+class Metric(NamedTuple):
+    """Uma métrica por grupo.
+
+    agg: 'nunique', 'sum', 'mean', 'count' ou 'nunique_cuisine' (usa o índice de culinárias).
+    where: None (todas as linhas), nome de uma coluna booleana, tupla (coluna, op, valor)
+    ou lista dessas condições (todas precisam valer).
+
+    Métricas com `where` (e 'nunique_cuisine') ficam NaN nos grupos sem nenhuma
+    linha elegível, como acontece ao filtrar antes do groupby.
+    """
+    name: str
+    column: str
+    agg: str
+    where: object = None
+
+
+# Preços (preco_medio_para_dois) sempre em dólar (pricing.PRICE_COLUMN)
+
+# Perguntas da aba País
+COUNTRY_METRICS = [
+    Metric('cidades', 'city', 'nunique'),
+    Metric('restaurantes', 'restaurant_id', 'nunique'),
+    Metric('restaurantes_preco4', 'restaurant_id', 'nunique', ('price_range', '==', 4)),
+    Metric('culinarias', 'cuisines', 'nunique_cuisine'),
+    Metric('votos', 'votes', 'sum'),
+    Metric('restaurantes_entregando', 'restaurant_id', 'nunique', 'is_delivering_now'),
+    Metric('restaurantes_reserva', 'restaurant_id', 'nunique', 'has_table_booking'),
+    Metric('media_votos', 'votes', 'mean'),
+    Metric('nota_media', 'aggregate_rating', 'mean'),
+    Metric('preco_medio_para_dois', PRICE_COLUMN, 'mean'),
+]
+
+# Rankings da aba Cidade
+CITY_METRICS = [
+    Metric('restaurantes', 'restaurant_id', 'nunique'),
+    Metric('restaurantes_nota_maior4', 'restaurant_id', 'nunique', ('aggregate_rating', '>', 4)),
+    Metric('restaurantes_nota_menor25', 'restaurant_id', 'nunique', ('aggregate_rating', '<', 2.5)),
+    Metric('preco_medio_para_dois', PRICE_COLUMN, 'mean'),
+    Metric('culinarias', 'cuisines', 'nunique_cuisine'),
+    Metric('restaurantes_reserva', 'restaurant_id', 'nunique', 'has_table_booking'),
+    Metric('restaurantes_entregando', 'restaurant_id', 'nunique', 'is_delivering_now'),
+    Metric('restaurantes_online', 'restaurant_id', 'nunique', 'has_online_delivery'),
+]
+
+# Rankings da aba Tipos de Culinária (uma linha por restaurante x culinária, como no explode)
+CUISINE_METRICS = [
+    Metric('preco_medio_para_dois', PRICE_COLUMN, 'mean'),
+    Metric('nota_media', 'aggregate_rating', 'mean'),
+    Metric('restaurantes_online_entregando', 'restaurant_id', 'nunique',
+           ['has_online_delivery', 'is_delivering_now']),
+]
+
+
+def _where_mask(df: pd.DataFrame, where) -> np.ndarray:
+    if where is None:
+        return np.ones(len(df), dtype=bool)
+    if isinstance(where, str):
+        return df[where].to_numpy(dtype=bool)
+    if isinstance(where, list):
+        return np.logical_and.reduce([_where_mask(df, w) for w in where])
+    col, op, value = where
+    return _OPS[op](df[col], value).to_numpy(dtype=bool)
+
+
+def _nunique(gcodes: np.ndarray, vcodes: np.ndarray, n_values: int, n_groups: int) -> np.ndarray:
+    """Número de valores distintos por grupo a partir de pares (grupo, valor) já filtrados."""
+    pairs = np.unique(gcodes.astype(np.int64) * max(n_values, 1) + vcodes)
+    return np.bincount(pairs // max(n_values, 1), minlength=n_groups)
+
+
+def group_metrics(df: pd.DataFrame, key: str, metrics, cuisine_index: CuisineIndex = None) -> pd.DataFrame:
+    """Calcula `metrics` por `key` numa única passada e devolve um frame indexado por `key`.
+
+    Os grupos seguem a ordem do groupby (chaves ordenadas, só as observadas,
+    sem NaN), então `frame[m].sort_values(...)` reproduz o ranking da cadeia
+    de groupbys equivalente.
+    """
+    codes, groups = pd.factorize(df[key], sort=True)
+    n_groups = len(groups)
+    valid_key = codes >= 0
+
+    out = {}
+    value_codes = {}
+    for m in metrics:
+        if m.agg == 'nunique_cuisine':
+            out[m.name] = _cuisine_nunique(df, codes, n_groups, cuisine_index)
+            continue
+
+        sel = valid_key & _where_mask(df, m.where)
+        present = np.bincount(codes[sel], minlength=n_groups) > 0
+
+        if m.agg == 'count':
+            result = np.bincount(codes[sel], minlength=n_groups)
+        elif m.agg == 'nunique':
+            if m.column not in value_codes:
+                value_codes[m.column] = pd.factorize(df[m.column])
+            vcodes, uniques = value_codes[m.column]
+            ok = sel & (vcodes >= 0)
+            result = _nunique(codes[ok], vcodes[ok], len(uniques), n_groups)
+        elif m.agg in ('sum', 'mean'):
+            column = df[m.column]
+            values = column.to_numpy(dtype=float)
+            ok = sel & ~np.isnan(values)
+            total = np.bincount(codes[ok], weights=values[ok], minlength=n_groups)
+            if m.agg == 'sum':
+                # Soma de coluna inteira continua inteira, como no groupby
+                is_int = pd.api.types.is_integer_dtype(column.dtype)
+                result = total.round().astype(np.int64) if is_int else total
+            else:
+                n = np.bincount(codes[ok], minlength=n_groups)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+        else:
+            raise ValueError(f"Agregação desconhecida: {m.agg}")
+
+        out[m.name] = _absent_as_na(result, present) if m.where is not None else result
+
+    index = pd.Index(groups, name=key)
+    return pd.DataFrame(out, index=index)
+
+
+def _cuisine_nunique(df: pd.DataFrame, codes: np.ndarray, n_groups: int, cuisine_index: CuisineIndex) -> np.ndarray:
+    """Culinárias distintas por grupo, usando os pares (linha, culinária) da tabela ponte."""
+    if cuisine_index is None:
+        raise ValueError("Métrica 'nunique_cuisine' exige o índice de culinárias")
+    # Tabela ponte só das linhas de `df` (cujos rótulos são posições no dataset completo)
+    full = isinstance(df.index, pd.RangeIndex) and len(df) == cuisine_index.n_rows
+    local, cids = cuisine_index.bridge(None if full else df.index.to_numpy())
+    g = codes[local]
+    ok = g >= 0
+    counts = _nunique(g[ok], cids[ok], len(cuisine_index.names), n_groups)
+    return _absent_as_na(counts, counts > 0)
+
+
+def _absent_as_na(result: np.ndarray, present: np.ndarray):
+    """Marca como ausentes os grupos sem linhas elegíveis (inteiros viram Int64)."""
+    if np.issubdtype(result.dtype, np.integer):
+        return pd.arrays.IntegerArray(result.astype(np.int64), ~present)
+    return np.where(present, result, np.nan)
+
+
+def ranking(frame: pd.DataFrame, metric: str, ascending: bool = False) -> pd.Series:
+    """Série de uma métrica, sem grupos ausentes, ordenada como os rankings do app."""
+    s = frame[metric].dropna()
+    if s.dtype == 'Int64':
+        s = s.astype('int64')
+    return s.sort_values(ascending=ascending)
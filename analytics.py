@@ -0,0 +1,298 @@
+# ZF Restaurantes – Cálculos das abas
+# -------------------------------------------------------------
+# Funções puras (sem Streamlit) que respondem às questões de negócio de
+# cada aba a partir do frame preparado, das linhas do filtro e do índice
+# de culinárias. Como as abas são independentes entre si, `run_tabs`
+# pode despachá-las num pool de threads/processos e só depois o app
+# renderiza os resultados. Preços saem em dólar (pricing.PRICE_COLUMN);
+# pricing.convert_results passa para a moeda de exibição.
+# -------------------------------------------------------------
+
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+
+import numpy as np
+import pandas as pd
+
+from aggregations import CITY_METRICS, COUNTRY_METRICS, CUISINE_METRICS, group_metrics, ranking
+from cuisine_index import CuisineIndex
+from geo import cluster_pyramid, valid_coords
+from hierarchy import LocationIndex
+from pricing import PRICE_COLUMN
+from sorted_arrays import positions_in
+from views import TAB_COLUMNS, project
+
+TABS = ["Geral", "País", "Cidade", "Restaurantes", "Tipos de Culinária", "Mapa"]
+
+WORKERS_ENV = "FZ_WORKERS"
+
+# Culinárias com top/bottom na aba Tipos de Culinária: (rótulo, chave)
+CUISINE_TARGETS = [
+    ("Italiana","italian"), ("Americana","american"), ("Árabe","arabian"),
+    ("Japonesa","japanese"), ("Caseira","home food")
+]
+
+
+def default_workers() -> int:
+    """$FZ_WORKERS, senão uma thread por aba (limitado ao número de CPUs)."""
+    if os.environ.get(WORKERS_ENV):
+        return max(1, int(os.environ[WORKERS_ENV]))
+    return max(1, min(len(TABS), os.cpu_count() or 1))
+
+
+def cuisine_mask(df, cuisine_name: str, index: CuisineIndex):
+    # Regra de palavra (CuisineIndex.ids_word), avaliada uma vez por culinária distinta
+    # no índice (rótulos de `df` em ordem crescente, como saem de `project`)
+    hits = np.zeros(len(df), dtype=bool)
+    hits[positions_in(df.index.to_numpy(), index.rows(index.ids_word(cuisine_name)))] = True
+    return pd.Series(hits, index=df.index)
+
+
+def filter_rows(loc: LocationIndex, cidx: CuisineIndex, countries, cities, cuisines):
+    """Posições das linhas que passam pelos filtros da barra lateral (None = todas)."""
+    rows = loc.rows_for(countries, cities)
+    if cuisines:
+        # Interseção de listas ordenadas: custo pela lista de culinárias, não por n_rows
+        hits = cidx.rows(cidx.ids(cuisines))
+        rows = hits if rows is None else rows[positions_in(rows, hits)]
+    return rows
+
+
+def top_label(s):
+    return s.index[0] if len(s) else "—"
+
+
+# ============================= GERAL ==========================================
+def compute_geral(df: pd.DataFrame, rows, cidx: CuisineIndex, aggregates=None) -> dict:
+    df_f = project(df, rows, TAB_COLUMNS["Geral"])
+    return {
+        'restaurantes': int(df_f['restaurant_id'].nunique()),
+        'paises': int(df_f['country'].nunique()),
+        'cidades': int(df_f['city'].nunique()),
+        'votos': int(df_f['votes'].fillna(0).sum()),
+        # Tipos de culinária distintos (pela tabela ponte, sem explode)
+        'culinarias': cidx.distinct(rows),
+    }
+
+
+# ============================= PAÍS ===========================================
+def compute_pais(df: pd.DataFrame, rows, cidx: CuisineIndex, aggregates=None) -> dict:
+    # Sem filtro e com agregações mantidas (incremental.Aggregates), não há o que recalcular
+    if aggregates is not None and rows is None:
+        pais = aggregates.frame('country')
+    else:
+        g = project(df, rows, TAB_COLUMNS["País"])
+        # Todas as métricas por país numa única passada (ver aggregations.COUNTRY_METRICS)
+        pais = group_metrics(g, 'country', COUNTRY_METRICS, cidx)
+    pais_media_nota = ranking(pais, 'nota_media')
+    return {
+        # 1) País com mais cidades registradas (contagem de cidades únicas por país)
+        'pais_cidades': ranking(pais, 'cidades'),
+        # 2) País com mais restaurantes registrados
+        'pais_restaurantes': ranking(pais, 'restaurantes'),
+        # 3) País com mais restaurantes com price_range == 4
+        'pais_preco4': ranking(pais, 'restaurantes_preco4'),
+        # 4) País com maior quantidade de tipos de culinária distintos
+        'pais_cuisines': ranking(pais, 'culinarias'),
+        # 5) País com maior quantidade de avaliações feitas (soma de votes)
+        'pais_votes': ranking(pais, 'votos'),
+        # 6) País com maior quantidade de restaurantes que fazem entrega (is_delivering_now True)
+        'pais_entregas': ranking(pais, 'restaurantes_entregando'),
+        # 7) País com maior quantidade de restaurantes que aceitam reservas
+        'pais_reservas': ranking(pais, 'restaurantes_reserva'),
+        # 8) País com maior média de avaliações registradas (média de votes por restaurante)
+        'pais_media_votes': ranking(pais, 'media_votos'),
+        # 9) País com maior nota média registrada (média de aggregate_rating)
+        'pais_media_nota': pais_media_nota,
+        # 10) País com menor nota média registrada
+        'pais_menor_nota': pais_media_nota.sort_values(ascending=True),
+        # 11) Média de preço de um prato para dois por país (média simples)
+        'pais_preco_medio': ranking(pais, 'preco_medio_para_dois'),
+    }
+
+
+# ============================= CIDADE =========================================
+def compute_cidade(df: pd.DataFrame, rows, cidx: CuisineIndex, aggregates=None) -> dict:
+    if aggregates is not None and rows is None:
+        cidade = aggregates.frame('city')
+    else:
+        g = project(df, rows, TAB_COLUMNS["Cidade"])
+        # Metricas (uma única passada por cidade, ver aggregations.CITY_METRICS)
+        cidade = group_metrics(g, 'city', CITY_METRICS, cidx)
+    return {
+        'cidade_restaurantes': ranking(cidade, 'restaurantes'),
+        'cidade_nota_maior4': ranking(cidade, 'restaurantes_nota_maior4'),
+        'cidade_nota_menor25': ranking(cidade, 'restaurantes_nota_menor25'),
+        'cidade_preco_medio': ranking(cidade, 'preco_medio_para_dois'),
+        'cidade_cuisines': ranking(cidade, 'culinarias'),
+        'cidade_reservas': ranking(cidade, 'restaurantes_reserva'),
+        'cidade_entregas': ranking(cidade, 'restaurantes_entregando'),
+        'cidade_online': ranking(cidade, 'restaurantes_online'),
+    }
+
+
+# ============================= RESTAURANTES ===================================
+def compute_restaurantes(df: pd.DataFrame, rows, cidx: CuisineIndex, aggregates=None) -> dict:
+    g = project(df, rows, TAB_COLUMNS["Restaurantes"])
+
+    # 1) Restaurante com mais avaliações (votes)
+    top_votes = g.loc[g['votes'].notna()].sort_values('votes', ascending=False).head(1)
+
+    # 2) Restaurante com maior nota média (aggregate_rating)
+    top_rating = g.loc[g['aggregate_rating'].notna()].sort_values('aggregate_rating', ascending=False).head(1)
+
+    # 3) Restaurante com maior valor de prato p/ dois (em dólar, comparável entre países)
+    top_price = g.loc[g[PRICE_COLUMN].notna()].sort_values(PRICE_COLUMN, ascending=False).head(1)
+
+    # 4) Restaurante de culinária brasileira com menor média
+    mask_br_cuisine = cuisine_mask(g, 'Brazilian', cidx) | cuisine_mask(g, 'Brasileira', cidx)
+    br_cuisine = g.loc[mask_br_cuisine]
+    worst_br = br_cuisine.loc[br_cuisine['aggregate_rating'].notna()].sort_values('aggregate_rating').head(1)
+
+    # 5) Restaurante de culinária brasileira, do Brasil, com maior média
+    br_in_brazil = br_cuisine.loc[br_cuisine['country'].str.lower().isin(['brazil','brasil'])]
+    best_br_in_brazil = br_in_brazil.loc[br_in_brazil['aggregate_rating'].notna()].sort_values('aggregate_rating', ascending=False).head(1)
+
+    # 6) Aceitam pedido online têm, na média, mais avaliações?
+    online_mean_votes = g.groupby('has_online_delivery')['votes'].mean().rename({True:'Com online',False:'Sem online'})
+
+    # 7) Fazem reservas têm, na média, maior preço médio p/ dois?
+    booking_mean_price = g.groupby('has_table_booking')[PRICE_COLUMN].mean().rename({True:'Com reserva',False:'Sem reserva'})
+
+    # 8) Japonesa (EUA) vs BBQ (EUA) – preço médio p/ dois
+    usa = g.loc[g['country'].str.lower().isin(['united states of america','united states','usa','eua'])]
+    japanese_usa = usa.loc[cuisine_mask(usa, 'Japanese', cidx) | cuisine_mask(usa, 'Japonesa', cidx)]
+    bbq_usa = usa.loc[cuisine_mask(usa, 'BBQ', cidx) | cuisine_mask(usa, 'Barbecue', cidx) | cuisine_mask(usa, 'Churrasco', cidx)]
+
+    def first_name(frame):
+        return frame['restaurant_name'].iloc[0] if len(frame) else "—"
+
+    return {
+        'top_votes': first_name(top_votes),
+        'top_rating': first_name(top_rating),
+        'top_price': first_name(top_price),
+        'worst_br': first_name(worst_br),
+        'best_br_in_brazil': first_name(best_br_in_brazil),
+        'online_mean_votes': online_mean_votes,
+        'booking_mean_price': booking_mean_price,
+        'japanese_mean_price': japanese_usa[PRICE_COLUMN].mean(),
+        'bbq_mean_price': bbq_usa[PRICE_COLUMN].mean(),
+        'top10_votes': g[['restaurant_name','country','city','votes']].sort_values('votes', ascending=False).head(10),
+    }
+
+
+# ============================= TIPOS DE CULINÁRIA ============================
+def compute_culinaria(df: pd.DataFrame, rows, cidx: CuisineIndex, aggregates=None) -> dict:
+    g = project(df, rows, TAB_COLUMNS["Tipos de Culinária"])
+
+    def top_bottom_by_cuisine(cname):
+        sub = g.iloc[positions_in(g.index.to_numpy(), cidx.rows(cidx.ids_lower(cname)))]
+        top_row = sub.sort_values('aggregate_rating', ascending=False).head(1)
+        bottom_row = sub.sort_values('aggregate_rating', ascending=True).head(1)
+        return top_row, bottom_row
+
+    # 1-10) Top/Bottom por culinárias específicas
+    top_bottom = []
+    for label, key in CUISINE_TARGETS:
+        top_row, bottom_row = top_bottom_by_cuisine(label)
+        top_bottom.append((
+            label,
+            top_row['restaurant_name'].iloc[0] if len(top_row) else "—",
+            bottom_row['restaurant_name'].iloc[0] if len(bottom_row) else "—",
+        ))
+
+    if aggregates is not None and rows is None:
+        # Agregações mantidas por culinária (aggregations.CUISINE_METRICS)
+        cul = aggregates.frame('cuisine')
+    else:
+        # Uma linha por restaurante x culinária (tabela ponte), só com colunas numéricas
+        local, cids = cidx.bridge(rows)
+        long = pd.DataFrame({'cuisine': cids})
+        for m in CUISINE_METRICS:
+            for col in [m.column] + (m.where if isinstance(m.where, list) else []):
+                long[col] = g[col].to_numpy()[local]
+        cul = group_metrics(long, 'cuisine', CUISINE_METRICS)
+        cul.index = pd.Index(cidx.names[cul.index.to_numpy()], name='cuisine', dtype=object)
+
+    # 11) Tipo de culinária com maior valor médio de prato p/ dois
+    cuisine_price_mean = cul['preco_medio_para_dois'].rename(PRICE_COLUMN).sort_values(ascending=False)
+
+    # 12) Tipo de culinária com maior nota média
+    cuisine_rating_mean = cul['nota_media'].rename('aggregate_rating').sort_values(ascending=False)
+
+    # 13) Tipo de culinária com mais restaurantes que aceitam pedidos online e fazem entregas
+    cuisine_online_delivery = ranking(cul, 'restaurantes_online_entregando').rename('restaurant_id')
+
+    return {
+        'top_bottom': top_bottom,
+        'cuisine_price_mean': cuisine_price_mean,
+        'cuisine_rating_mean': cuisine_rating_mean,
+        'cuisine_online_delivery': cuisine_online_delivery,
+    }
+
+
+# ============================= MAPA ===========================================
+def compute_mapa(df: pd.DataFrame, rows, cidx: CuisineIndex, aggregates=None) -> dict:
+    g = project(df, rows, TAB_COLUMNS["Mapa"])
+    lat, lon = g['latitude'].to_numpy(), g['longitude'].to_numpy()
+    ok = valid_coords(lat, lon)
+
+    # Clusters por nível de zoom (só eles vão para o navegador)
+    clusters = cluster_pyramid(lat[ok], lon[ok], g['aggregate_rating'].to_numpy()[ok], g.index.to_numpy()[ok])
+    return {
+        'pontos': int(ok.sum()),
+        'sem_coordenadas': int(len(g) - ok.sum()),
+        'clusters': clusters,
+    }
+
+
+TAB_FUNCTIONS = {
+    "Geral": compute_geral,
+    "País": compute_pais,
+    "Cidade": compute_cidade,
+    "Restaurantes": compute_restaurantes,
+    "Tipos de Culinária": compute_culinaria,
+    "Mapa": compute_mapa,
+}
+
+
+def _timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def run_tabs(df: pd.DataFrame, rows, cidx: CuisineIndex, workers: int = 1,
+             executor: str = "thread", probe=None, aggregates=None, tabs=None):
+    """Calcula as abas (`tabs`, padrão TABS) e devolve (resultados, segundos por aba, segundos no total).
+
+    `aggregates` (incremental.Aggregates de `df`) dispensa o groupby das abas
+    País, Cidade e Tipos de Culinária quando não há filtro.
+
+    workers <= 1 (ou `probe` ligado, que mede uma aba por vez) roda em série.
+    executor='process' serializa df/índice para cada aba: só compensa quando
+    o cálculo domina a cópia. Se o pool falhar, cai para a execução em série.
+    """
+    tabs = TABS if tabs is None else tabs
+    t0 = time.perf_counter()
+    timed = {}
+    if workers > 1 and not (probe is not None and probe.enabled):
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        try:
+            with pool_cls(max_workers=min(workers, len(tabs))) as pool:
+                futures = {tab: pool.submit(_timed, TAB_FUNCTIONS[tab], df, rows, cidx, aggregates) for tab in tabs}
+                timed = {tab: f.result() for tab, f in futures.items()}
+        except (BrokenProcessPool, PicklingError, OSError):
+            timed = {}
+    if not timed:
+        for tab in tabs:
+            with probe.track(tab) if probe is not None else nullcontext():
+                timed[tab] = _timed(TAB_FUNCTIONS[tab], df, rows, cidx, aggregates)
+
+    results = {tab: r for tab, (r, _) in timed.items()}
+    seconds = {tab: s for tab, (_, s) in timed.items()}
+    return results, seconds, time.perf_counter() - t0
@@ -18,11 +18,33 @@
 # -------------------------------------------------------------
 
 import io
+import os
 import sys
 import math
+import threading
 import numpy as np
 import pandas as pd
 import streamlit as st
+import folium
+from streamlit_folium import st_folium
+
+from analytics import TABS, default_workers, filter_rows, run_tabs, top_label
+from cuisine_index import CuisineIndex
+from geo import PRECLUSTER_MAX_ZOOM, GridIndex, cluster_points, clusters_in_bounds
+from hierarchy import LocationIndex
+from incremental import Aggregates, DeltaError, chain_digest, update
+from memo import ResultCache, filter_key
+import disk_cache
+from data_prep import MissingColumnsError, schema_key
+from pricing import DEFAULT_TARGET, TARGETS, convert_results, unknown_currencies
+from sorted_arrays import isin_sorted
+from profiling import MemoryProbe, Profiler, enable_logging
+
+# Copy-on-write: projeções e recortes não copiam dados até serem alterados
+pd.set_option("mode.copy_on_write", True)
+
+# FZ_PROFILE=1 liga o modo debug por padrão e manda as etapas para o log
+PROFILE_ENV = "FZ_PROFILE"
 
 # -------------------------------------------------------------
 # Configurações da página
@@ -42,331 +64,401 @@ st.caption("Primeira versão funcional com cálculos automáticos para responder
 with st.sidebar:
     st.header("⚙️ Configuração de Dados")
     uploaded = st.file_uploader("CDS_Analista/FTC_Analisando_Dados_com_Python/Projeto_Aluno/PA-Final_Project/dataset/new_zomato.csv")    
+    local_path = st.text_input("...ou caminho local do CSV", placeholder="dataset/new_zomato.csv").strip()
+    chunk_rows = st.number_input(
+        "Ingestão em blocos (linhas por bloco, 0 = ler tudo de uma vez)",
+        min_value=0, value=0, step=100_000,
+        help="Para CSVs maiores que a memória: lê em blocos e grava um cache colunar em disco.",
+    )
+    delta_files = st.file_uploader(
+        "Atualizações incrementais (delta por restaurant_id)", type="csv", accept_multiple_files=True,
+        help="CSV com as colunas do dataset + coluna `op` (insert/update/delete), aplicados na ordem de envio.",
+    )
     sample_cols = [
         "restaurant_id","restaurant_name","country","city","cuisines",
         "average_cost_for_two","currency","aggregate_rating","rating_text",
         "votes","price_range","has_online_delivery","is_delivering_now",
-        "has_table_booking"
+        "has_table_booking","latitude","longitude"
     ]
     st.markdown("**Colunas esperadas:** ")
     st.code(", ".join(sample_cols), language="text")
 
-    currency_note = st.checkbox("Meus preços estão em moedas diferentes (ver nota)")
+    currency = st.selectbox("Moeda dos preços", options=list(TARGETS), index=list(TARGETS).index(DEFAULT_TARGET))
     st.markdown("""
-    *Nota:* A métrica **preço médio para duas pessoas por país** presume que os preços
-    estejam **na mesma moeda** por país. Se seu dataset tiver múltiplas moedas por país,
-    normalize antes (ex.: converter para USD). Esta versão não converte câmbio.
+    *Nota:* Os preços de cada restaurante são convertidos da moeda local (coluna `currency`)
+    por uma **tabela de câmbio offline**, então as médias e rankings de preço comparam
+    países diferentes. Trocar a moeda só reescala os resultados já calculados.
     """)
 
+    workers = st.number_input(
+        "Threads para os cálculos das abas", min_value=1, max_value=len(TABS),
+        value=min(default_workers(), len(TABS)), help="1 = em série.",
+    )
+    memory_mode = st.checkbox(
+        "Medir memória por aba",
+        help="Bytes alocados e variação do RSS por aba; no modo debug, variação de memória por etapa (mais lento).",
+    )
+    debug_mode = st.checkbox(
+        "Modo debug (tempo por etapa)", value=bool(os.environ.get(PROFILE_ENV)),
+        help="Mede carga, preparo, filtro, cálculo e renderização de cada aba neste rerun.",
+    )
+
+profiler = Profiler(enabled=debug_mode, memory=memory_mode)
+
+
+def stop() -> None:
+    """st.stop() sem deixar o tracemalloc do profiler ligado para os próximos reruns."""
+    profiler.close()
+    st.stop()
+
+
+def rerun() -> None:
+    """st.rerun() pelo mesmo motivo de `stop`: o rerun sai antes do profiler.close() do fim."""
+    profiler.close()
+    st.rerun()
+
+
 # Funções utilitárias ----------------------------------------------------------
 
-def _coerce_bool(x):
-    """Normaliza valores booleanos/flags que podem vir como 0/1, True/False, Yes/No, 'Y'/'N', etc."""
-    if pd.isna(x):
-        return False
-    if isinstance(x, (int, float)):
-        return bool(int(x))
-    s = str(x).strip().lower()
-    return s in {"1", "true", "yes", "y", "sim"}
-
-
-def _clean_cuisines(s):
-    if pd.isna(s):
-        return []
-    # Divide por vírgula e limpa espaços
-    return [c.strip() for c in str(s).split(',') if c.strip()]
-
-
-def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    # Renomeia colunas essenciais se houver variações comuns
-    rename_map = {
-        'Restaurant ID': 'restaurant_id',
-        'Restaurant Name': 'restaurant_name',
-        'Country Code': 'country',
-        'City': 'city',
-        'Cuisines': 'cuisines',
-        'Average Cost for two': 'average_cost_for_two',
-        'Currency': 'currency',
-        'Aggregate rating': 'aggregate_rating',
-        'Rating text': 'rating_text',
-        'Votes': 'votes',
-        'Price range': 'price_range',
-        'Has Online delivery': 'has_online_delivery',
-        'Is delivering now': 'is_delivering_now',
-        'Has Table booking': 'has_table_booking',
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    # Garante colunas mínimas
-    required = {
-        "restaurant_id","restaurant_name","country","city","cuisines",
-        "average_cost_for_two","currency","aggregate_rating","votes","price_range",
-        "has_online_delivery","is_delivering_now","has_table_booking"
-    }
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        st.error(f"Faltam colunas no CSV: {missing}")
-        st.stop()
-
-    # Tipagens básicas
-    df['restaurant_id'] = pd.to_numeric(df['restaurant_id'], errors='coerce')
-    df['average_cost_for_two'] = pd.to_numeric(df['average_cost_for_two'], errors='coerce')
-    df['aggregate_rating'] = pd.to_numeric(df['aggregate_rating'], errors='coerce')
-    df['votes'] = pd.to_numeric(df['votes'], errors='coerce')
-    df['price_range'] = pd.to_numeric(df['price_range'], errors='coerce')
-
-    # Normaliza flags
-    for col in ['has_online_delivery','is_delivering_now','has_table_booking']:
-        df[col] = df[col].apply(_coerce_bool)
-
-    # Limpa strings
-    for col in ['restaurant_name','country','city','currency']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-
-    # Cuisines em lista + coluna auxiliar lower
-    df['cuisines_list'] = df['cuisines'].apply(_clean_cuisines)
-    df['cuisines_lower'] = df['cuisines'].fillna('').str.lower()
+# Limites do cache de dados preparados (por conteúdo do arquivo)
+CACHE_MAX_ENTRIES = 8
+CACHE_TTL_SECONDS = 60 * 60
+
+
+@st.cache_resource
+def cache_stats() -> dict:
+    """Contadores do cache de dados, compartilhados entre todas as sessões."""
+    return {"lock": threading.Lock(), "calls": 0, "misses": 0, "disk_hits": 0}
+
 
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def upload_digest(file_id: str, _data: bytes) -> str:
+    """SHA-256 do upload, calculado uma vez por arquivo enviado (`file_id` muda a cada envio)."""
+    return disk_cache.bytes_digest(_data)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner="Calculando hash do CSV...")
+def local_digest(path: str, size: int, mtime_ns: int) -> str:
+    """SHA-256 do arquivo local; relido só quando o caminho, o tamanho ou a data de modificação mudam."""
+    return disk_cache.file_digest(path)
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner="Preparando dados...")
+def load_prepared(digest: str, schema: str, _source, _chunk_rows: int = 0, _profiler: Profiler = None) -> pd.DataFrame:
+    """Lê e prepara o CSV (bytes ou caminho), passando pelo cache colunar em disco.
+
+    A chave do cache é (digest, schema); `_source` não é re-hasheado e o modo de
+    ingestão (`_chunk_rows`) não entra na chave, pois o resultado é o mesmo.
+    O DataFrame é compartilhado entre reruns e sessões sem cópia: somente leitura.
+    """
+    df, disk_hit = disk_cache.load_prepared(_source, digest, chunk_rows=_chunk_rows or None, profiler=_profiler)
+    stats = cache_stats()
+    with stats["lock"]:
+        stats["misses"] += 1
+        stats["disk_hits"] += int(disk_hit)
     return df
 
 
-def cuisine_mask(df, cuisine_name: str):
-    return df['cuisines_lower'].str.contains(fr"\b{cuisine_name.strip().lower()}\b", regex=True)
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_cuisine_index(digest: str, schema: str, _df: pd.DataFrame) -> CuisineIndex:
+    """Índice de culinárias do dataset `digest`; compartilhado (somente leitura) entre sessões."""
+    return CuisineIndex.build(_df['cuisines'])
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_aggregates(digest: str, schema: str, _df: pd.DataFrame) -> Aggregates:
+    """Agregações mantidas (país, cidade, culinária) do dataset `digest`, base das atualizações."""
+    return Aggregates.build(_df)
+
+
+@st.cache_resource
+def delta_versions() -> dict:
+    """Última versão com deltas de cada tabela base, compartilhada entre sessões.
+
+    Uma entrada por (digest base, schema): cada versão é uma cópia inteira da
+    tabela, então as intermediárias não ficam guardadas.
+    """
+    return {"lock": threading.Lock(), "latest": {}}
+
+
+def apply_deltas(base: str, schema: str, df: pd.DataFrame, files):
+    """(digest, tabela, agregações, resumos) depois de aplicar `files` em ordem sobre a base.
+
+    Se a versão guardada da mesma base for um prefixo da sequência atual, só
+    os deltas novos são aplicados sobre ela. A nova versão substitui a
+    anterior, e os índices do digest substituído saem do cache.
+    """
+    chain, digest = [], base
+    for f in files:
+        digest = chain_digest(digest, f.getvalue())
+        chain.append(digest)
+
+    versions = delta_versions()
+    with versions["lock"]:
+        saved = versions["latest"].get((base, schema))
+    if saved is not None and saved["chain"] == chain[:len(saved["chain"])]:
+        df, aggregates, summaries = saved["df"], saved["aggregates"], list(saved["summaries"])
+    else:
+        aggregates, summaries = load_aggregates(base, schema, df), []
+    if len(summaries) < len(files):
+        with st.spinner("Aplicando atualização..."):
+            for f in files[len(summaries):]:
+                df, aggregates, summary = update(df, aggregates, io.BytesIO(f.getvalue()))
+                summaries.append(summary)
+        with versions["lock"]:
+            versions["latest"][(base, schema)] = {"chain": chain, "df": df, "aggregates": aggregates,
+                                                  "summaries": summaries}
+        if saved is not None and saved["chain"][-1] != digest:
+            for load_index in (load_cuisine_index, load_location_index, load_grid_index):
+                load_index.clear(saved["chain"][-1], schema, None)
+    return digest, df, aggregates, summaries
+
+
+@st.cache_resource
+def result_cache() -> ResultCache:
+    """Resultados das abas por (dataset, filtro), compartilhados entre sessões."""
+    return ResultCache()
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_location_index(digest: str, schema: str, _df: pd.DataFrame) -> LocationIndex:
+    """Hierarquia país → cidade → faixa de linhas do dataset `digest` (somente leitura)."""
+    return LocationIndex.build(_df)
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_grid_index(digest: str, schema: str, _df: pd.DataFrame) -> GridIndex:
+    """Índice espacial (grade) das coordenadas do dataset `digest` (somente leitura)."""
+    return GridIndex.build(_df['latitude'].to_numpy(), _df['longitude'].to_numpy())
+
+
+def filter_options(loc: LocationIndex):
+    """Opções padrão da barra lateral: todos os países e todas as suas cidades."""
+    return loc.countries, loc.cities_for(loc.countries)
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner="Pré-calculando visão padrão...")
+def warm_default_results(digest: str, schema: str, _df: pd.DataFrame, _cidx: CuisineIndex,
+                         _loc: LocationIndex, _aggregates: Aggregates = None) -> str:
+    """Pré-calcula a seleção com que toda sessão abre (todos os países e cidades, sem culinária)."""
+    countries, cities = filter_options(_loc)
+    key = filter_key(digest, schema, countries, cities, [])
+    memo = result_cache()
+    if key not in memo:
+        memo.put(key, run_tabs(_df, None, _cidx, workers=default_workers(), aggregates=_aggregates))
+    return key
 
 
 # Carrega/Prepara dados --------------------------------------------------------
 if uploaded is not None:
-    try:
-        df_raw = pd.read_csv(uploaded)
-    except Exception as e:
-        st.error(f"Erro ao ler CSV: {e}")
-        st.stop()
+    source = uploaded.getvalue()
+    digest = upload_digest(uploaded.file_id, source)
+elif local_path:
+    if not os.path.isfile(local_path):
+        st.error(f"Arquivo não encontrado: {local_path}")
+        stop()
+    source = local_path
+    info = os.stat(local_path)
+    digest = local_digest(os.path.abspath(local_path), info.st_size, info.st_mtime_ns)
 else:
-    st.info("Faça upload de um CSV para iniciar.")
-    st.stop()
+    st.info("Faça upload de um CSV (ou informe um caminho local) para iniciar.")
+    stop()
+
+stats = cache_stats()
+with stats["lock"]:
+    stats["calls"] += 1
+
+try:
+    with profiler.stage("carga"):
+        df = load_prepared(digest, schema_key(), source, int(chunk_rows), profiler)
+except (MissingColumnsError, disk_cache.CacheWriteError) as e:
+    st.error(str(e))
+    stop()
+except Exception as e:
+    st.error(f"Erro ao ler CSV: {e}")
+    stop()
+
+# Deltas: cada versão da tabela tem seu próprio digest (índices e memo seguem por ele)
+aggregates = None
+applied = []
+if delta_files:
+    try:
+        with profiler.stage("deltas"):
+            digest, df, aggregates, summaries = apply_deltas(digest, schema_key(), df, delta_files)
+            applied = [(f.name, summary) for f, summary in zip(delta_files, summaries)]
+    except (DeltaError, MissingColumnsError) as e:
+        st.error(f"Erro ao aplicar atualização: {e}")
+        stop()
+
+with profiler.stage("indices"):
+    cidx = load_cuisine_index(digest, schema_key(), df)
+    loc = load_location_index(digest, schema_key(), df)
+with profiler.stage("visao_padrao"):
+    warm_default_results(digest, schema_key(), df, cidx, loc, aggregates)
 
-# Prepara
-df = prepare_dataframe(df_raw).copy()
+with st.sidebar:
+    st.caption(
+        f"Cache de dados: {stats['calls'] - stats['misses']} hits / {stats['misses']} misses"
+        f" ({stats['disk_hits']} lidos do cache em disco)"
+    )
+    unknown = unknown_currencies(df['currency'])
+    if unknown:
+        st.warning(f"Sem taxa de câmbio para: {', '.join(unknown)}. Esses preços ficam fora das médias.")
+    for name, summary in applied:
+        st.caption(
+            f"Delta {name}: +{summary['inseridos']} inseridos · {summary['atualizados']} atualizados"
+            f" · −{summary['removidos']} removidos"
+        )
 
 # Filtros globais --------------------------------------------------------------
-with st.sidebar:
+with st.sidebar, profiler.stage("opcoes_filtro"):
     st.header("🔍 Filtros")
-    countries = sorted(df['country'].dropna().unique().tolist())
-    cities = sorted(df['city'].dropna().unique().tolist())
-    cuisines_all = sorted(sorted({c for lst in df['cuisines_list'] for c in lst}))
+    countries = loc.countries
+    cuisines_all = cidx.names.tolist()
 
     sel_countries = st.multiselect("País", options=countries, default=countries)
+    # As cidades seguem os países escolhidos
+    cities = loc.cities_for(sel_countries)
     sel_cities = st.multiselect("Cidade", options=cities, default=cities)
     sel_cuisines = st.multiselect("Tipo de culinária", options=cuisines_all)
 
-# Aplica filtros
-mask = df['country'].isin(sel_countries) & df['city'].isin(sel_cities)
-if sel_cuisines:
-    mask = mask & df['cuisines_list'].apply(lambda lst: any(c in lst for c in sel_cuisines))
-
-df_f = df.loc[mask].copy()
+# Calcula as abas (independentes entre si) antes de renderizar, reaproveitando
+# resultados de seleções já vistas (o modo memória sempre recalcula para medir)
+memo = result_cache()
+memo_key = filter_key(digest, schema_key(), sel_countries, sel_cities, sel_cuisines)
+probe = MemoryProbe(enabled=memory_mode)
+memoized = None if probe.enabled else memo.get(memo_key)
+# Aplica filtros (faixas contíguas de linhas por país/cidade); o mapa também usa o recorte
+with profiler.stage("filtro"):
+    rows = filter_rows(loc, cidx, sel_countries, sel_cities, sel_cuisines)
+with profiler.stage("calculo"):
+    if memoized is None:
+        memoized = run_tabs(df, rows, cidx, workers=int(workers), probe=probe, aggregates=aggregates)
+        memo.put(memo_key, memoized)
+        memo_hit = False
+        for tab, seconds in memoized[1].items():
+            profiler.add(tab, seconds)
+    else:
+        memo_hit = True
+results, tab_seconds, compute_seconds = memoized
+# Preços calculados em dólar; a moeda de exibição só reescala os resultados
+results = convert_results(results, currency)
 
 # Tabs principais --------------------------------------------------------------
-tab_geral, tab_pais, tab_cidade, tab_rest, tab_cuisine = st.tabs([
-    "Geral", "País", "Cidade", "Restaurantes", "Tipos de Culinária"
-])
+tab_geral, tab_pais, tab_cidade, tab_rest, tab_cuisine, tab_mapa = st.tabs(TABS)
 
 # ============================= GERAl ==========================================
-with tab_geral:
+with tab_geral, profiler.stage("render:Geral"):
     st.subheader("📊 Visão Geral")
+    r = results["Geral"]
     c1,c2,c3,c4,c5 = st.columns(5)
-    c1.metric("Restaurantes únicos", int(df_f['restaurant_id'].nunique()))
-    c2.metric("Países únicos", int(df_f['country'].nunique()))
-    c3.metric("Cidades únicas", int(df_f['city'].nunique()))
-    c4.metric("Total de avaliações (votes)", int(df_f['votes'].fillna(0).sum()))
+    c1.metric("Restaurantes únicos", r['restaurantes'])
+    c2.metric("Países únicos", r['paises'])
+    c3.metric("Cidades únicas", r['cidades'])
+    c4.metric("Total de avaliações (votes)", r['votos'])
     # Quantidade de tipos de culinária distintos considerando explode
-    cuisines_distintos = sorted({c for lst in df_f['cuisines_list'] for c in lst})
-    c5.metric("Tipos de culinária distintos", len(cuisines_distintos))
+    c5.metric("Tipos de culinária distintos", r['culinarias'])
 
     st.divider()
     st.caption("Os números refletem os filtros aplicados na barra lateral.")
 
 # ============================= PAÍS ===========================================
-with tab_pais:
+with tab_pais, profiler.stage("render:País"):
     st.subheader("🌍 Análises por País")
-    g = df_f.copy()
-
-    # 1) País com mais cidades registradas (contagem de cidades únicas por país)
-    pais_cidades = g.groupby('country')['city'].nunique().sort_values(ascending=False)
-
-    # 2) País com mais restaurantes registrados
-    pais_restaurantes = g.groupby('country')['restaurant_id'].nunique().sort_values(ascending=False)
-
-    # 3) País com mais restaurantes com price_range == 4
-    pais_preco4 = g.loc[g['price_range'] == 4].groupby('country')['restaurant_id'].nunique().sort_values(ascending=False)
-
-    # 4) País com maior quantidade de tipos de culinária distintos
-    # Explode cuisines
-    df_c = g[['country','cuisines_list']].explode('cuisines_list')
-    pais_cuisines = df_c.dropna().groupby('country')['cuisines_list'].nunique().sort_values(ascending=False)
-
-    # 5) País com maior quantidade de avaliações feitas (soma de votes)
-    pais_votes = g.groupby('country')['votes'].sum().sort_values(ascending=False)
-
-    # 6) País com maior quantidade de restaurantes que fazem entrega (is_delivering_now True)
-    pais_entregas = g.loc[g['is_delivering_now']].groupby('country')['restaurant_id'].nunique().sort_values(ascending=False)
-
-    # 7) País com maior quantidade de restaurantes que aceitam reservas
-    pais_reservas = g.loc[g['has_table_booking']].groupby('country')['restaurant_id'].nunique().sort_values(ascending=False)
-
-    # 8) País com maior média de avaliações registradas (média de votes por restaurante)
-    pais_media_votes = g.groupby('country').apply(lambda x: x['votes'].mean()).sort_values(ascending=False)
-
-    # 9) País com maior nota média registrada (média de aggregate_rating)
-    pais_media_nota = g.groupby('country')['aggregate_rating'].mean().sort_values(ascending=False)
-
-    # 10) País com menor nota média registrada
-    pais_menor_nota = pais_media_nota.sort_values(ascending=True)
-
-    # 11) Média de preço de um prato para dois por país (média simples)
-    pais_preco_medio = g.groupby('country')['average_cost_for_two'].mean().sort_values(ascending=False)
-
-    def top_label(s):
-        return s.index[0] if len(s) else "—"
+    r = results["País"]
 
     c1,c2,c3 = st.columns(3)
-    c1.metric("Mais cidades", top_label(pais_cidades))
-    c2.metric("Mais restaurantes", top_label(pais_restaurantes))
-    c3.metric("Mais restaurantes preço=4", top_label(pais_preco4))
+    c1.metric("Mais cidades", top_label(r['pais_cidades']))
+    c2.metric("Mais restaurantes", top_label(r['pais_restaurantes']))
+    c3.metric("Mais restaurantes preço=4", top_label(r['pais_preco4']))
 
     c4,c5,c6 = st.columns(3)
-    c4.metric("Mais tipos de culinária distintos", top_label(pais_cuisines))
-    c5.metric("Mais avaliações (soma de votes)", top_label(pais_votes))
-    c6.metric("Mais restaurantes que entregam", top_label(pais_entregas))
+    c4.metric("Mais tipos de culinária distintos", top_label(r['pais_cuisines']))
+    c5.metric("Mais avaliações (soma de votes)", top_label(r['pais_votes']))
+    c6.metric("Mais restaurantes que entregam", top_label(r['pais_entregas']))
 
     c7,c8,c9 = st.columns(3)
-    c7.metric("Mais restaurantes com reservas", top_label(pais_reservas))
-    c8.metric("Maior média de avaliações (votes)", top_label(pais_media_votes))
-    c9.metric("Maior nota média", top_label(pais_media_nota))
+    c7.metric("Mais restaurantes com reservas", top_label(r['pais_reservas']))
+    c8.metric("Maior média de avaliações (votes)", top_label(r['pais_media_votes']))
+    c9.metric("Maior nota média", top_label(r['pais_media_nota']))
 
     c10, c11 = st.columns(2)
-    c10.metric("Menor nota média", top_label(pais_menor_nota))
+    c10.metric("Menor nota média", top_label(r['pais_menor_nota']))
     # Mostra tabela de preço médio por país
-    c11.dataframe(pais_preco_medio.reset_index().rename(columns={'average_cost_for_two':'preco_medio_para_dois'}))
+    c11.dataframe(r['pais_preco_medio'].rename(f"preço médio p/ dois ({currency})").reset_index())
 
     st.divider()
     st.markdown("**Rankings por País (top 10)**")
     colA, colB = st.columns(2)
     with colA:
-        st.bar_chart(pais_restaurantes.head(10))
-        st.bar_chart(pais_cidades.head(10))
-        st.bar_chart(pais_votes.head(10))
+        st.bar_chart(r['pais_restaurantes'].head(10))
+        st.bar_chart(r['pais_cidades'].head(10))
+        st.bar_chart(r['pais_votes'].head(10))
     with colB:
-        st.bar_chart(pais_cuisines.head(10))
-        st.bar_chart(pais_preco4.head(10))
-        st.bar_chart(pais_preco_medio.head(10))
+        st.bar_chart(r['pais_cuisines'].head(10))
+        st.bar_chart(r['pais_preco4'].head(10))
+        st.bar_chart(r['pais_preco_medio'].head(10))
 
 # ============================= CIDADE =========================================
-with tab_cidade:
+with tab_cidade, profiler.stage("render:Cidade"):
     st.subheader("🏙️ Análises por Cidade")
-    g = df_f.copy()
-
-    # Metricas
-    cidade_restaurantes = g.groupby('city')['restaurant_id'].nunique().sort_values(ascending=False)
-    cidade_nota_maior4 = g.loc[g['aggregate_rating'] > 4].groupby('city')['restaurant_id'].nunique().sort_values(ascending=False)
-    cidade_nota_menor25 = g.loc[g['aggregate_rating'] < 2.5].groupby('city')['restaurant_id'].nunique().sort_values(ascending=False)
-    cidade_preco_medio = g.groupby('city')['average_cost_for_two'].mean().sort_values(ascending=False)
-
-    df_c = g[['city','cuisines_list']].explode('cuisines_list')
-    cidade_cuisines = df_c.dropna().groupby('city')['cuisines_list'].nunique().sort_values(ascending=False)
-
-    cidade_reservas = g.loc[g['has_table_booking']].groupby('city')['restaurant_id'].nunique().sort_values(ascending=False)
-    cidade_entregas = g.loc[g['is_delivering_now']].groupby('city')['restaurant_id'].nunique().sort_values(ascending=False)
-    cidade_online = g.loc[g['has_online_delivery']].groupby('city')['restaurant_id'].nunique().sort_values(ascending=False)
-
-    def top_label(s):
-        return s.index[0] if len(s) else "—"
+    r = results["Cidade"]
 
     c1,c2,c3,c4 = st.columns(4)
-    c1.metric("Mais restaurantes", top_label(cidade_restaurantes))
-    c2.metric("Mais nota > 4", top_label(cidade_nota_maior4))
-    c3.metric("Mais nota < 2.5", top_label(cidade_nota_menor25))
-    c4.metric("Maior preço médio p/ dois", top_label(cidade_preco_medio))
+    c1.metric("Mais restaurantes", top_label(r['cidade_restaurantes']))
+    c2.metric("Mais nota > 4", top_label(r['cidade_nota_maior4']))
+    c3.metric("Mais nota < 2.5", top_label(r['cidade_nota_menor25']))
+    c4.metric("Maior preço médio p/ dois", top_label(r['cidade_preco_medio']))
 
     c5,c6,c7,c8 = st.columns(4)
-    c5.metric("Mais tipos de culinária distintos", top_label(cidade_cuisines))
-    c6.metric("Mais reservas", top_label(cidade_reservas))
-    c7.metric("Mais entregas", top_label(cidade_entregas))
-    c8.metric("Mais pedidos online", top_label(cidade_online))
+    c5.metric("Mais tipos de culinária distintos", top_label(r['cidade_cuisines']))
+    c6.metric("Mais reservas", top_label(r['cidade_reservas']))
+    c7.metric("Mais entregas", top_label(r['cidade_entregas']))
+    c8.metric("Mais pedidos online", top_label(r['cidade_online']))
 
     st.divider()
     st.markdown("**Rankings por Cidade (top 10)**")
     colA, colB = st.columns(2)
     with colA:
-        st.bar_chart(cidade_restaurantes.head(10))
-        st.bar_chart(cidade_nota_maior4.head(10))
-        st.bar_chart(cidade_nota_menor25.head(10))
+        st.bar_chart(r['cidade_restaurantes'].head(10))
+        st.bar_chart(r['cidade_nota_maior4'].head(10))
+        st.bar_chart(r['cidade_nota_menor25'].head(10))
     with colB:
-        st.bar_chart(cidade_preco_medio.head(10))
-        st.bar_chart(cidade_cuisines.head(10))
-        st.bar_chart(cidade_online.head(10))
+        st.bar_chart(r['cidade_preco_medio'].head(10))
+        st.bar_chart(r['cidade_cuisines'].head(10))
+        st.bar_chart(r['cidade_online'].head(10))
 
 # ============================= RESTAURANTES ===================================
-with tab_rest:
+with tab_rest, profiler.stage("render:Restaurantes"):
     st.subheader("🍽️ Análises por Restaurante")
-    g = df_f.copy()
-
-    # 1) Restaurante com mais avaliações (votes)
-    top_votes = g.loc[g['votes'].notna()].sort_values('votes', ascending=False).head(1)
-
-    # 2) Restaurante com maior nota média (aggregate_rating)
-    top_rating = g.loc[g['aggregate_rating'].notna()].sort_values('aggregate_rating', ascending=False).head(1)
-
-    # 3) Restaurante com maior valor de prato p/ dois
-    top_price = g.loc[g['average_cost_for_two'].notna()].sort_values('average_cost_for_two', ascending=False).head(1)
-
-    # 4) Restaurante de culinária brasileira com menor média
-    mask_br_cuisine = cuisine_mask(g, 'Brazilian') | cuisine_mask(g, 'Brasileira')
-    br_cuisine = g.loc[mask_br_cuisine]
-    worst_br = br_cuisine.loc[br_cuisine['aggregate_rating'].notna()].sort_values('aggregate_rating').head(1)
-
-    # 5) Restaurante de culinária brasileira, do Brasil, com maior média
-    br_in_brazil = br_cuisine.loc[br_cuisine['country'].str.lower().isin(['brazil','brasil'])]
-    best_br_in_brazil = br_in_brazil.loc[br_in_brazil['aggregate_rating'].notna()].sort_values('aggregate_rating', ascending=False).head(1)
-
-    # 6) Aceitam pedido online têm, na média, mais avaliações?
-    online_mean_votes = g.groupby('has_online_delivery')['votes'].mean().rename({True:'Com online',False:'Sem online'})
-
-    # 7) Fazem reservas têm, na média, maior preço médio p/ dois?
-    booking_mean_price = g.groupby('has_table_booking')['average_cost_for_two'].mean().rename({True:'Com reserva',False:'Sem reserva'})
-
-    # 8) Japonesa (EUA) vs BBQ (EUA) – preço médio p/ dois
-    usa = g.loc[g['country'].str.lower().isin(['united states of america','united states','usa','eua'])]
-    japanese_usa = usa.loc[cuisine_mask(usa, 'Japanese') | cuisine_mask(usa, 'Japonesa')]
-    bbq_usa = usa.loc[cuisine_mask(usa, 'BBQ') | cuisine_mask(usa, 'Barbecue') | cuisine_mask(usa, 'Churrasco')]
-    japanese_mean_price = japanese_usa['average_cost_for_two'].mean()
-    bbq_mean_price = bbq_usa['average_cost_for_two'].mean()
+    r = results["Restaurantes"]
+    japanese_mean_price = r['japanese_mean_price']
+    bbq_mean_price = r['bbq_mean_price']
 
     c1,c2,c3 = st.columns(3)
-    c1.metric("Mais avaliações", top_votes['restaurant_name'].iloc[0] if len(top_votes) else "—")
-    c2.metric("Maior nota média", top_rating['restaurant_name'].iloc[0] if len(top_rating) else "—")
-    c3.metric("Maior preço p/ dois", top_price['restaurant_name'].iloc[0] if len(top_price) else "—")
+    c1.metric("Mais avaliações", r['top_votes'])
+    c2.metric("Maior nota média", r['top_rating'])
+    c3.metric("Maior preço p/ dois", r['top_price'])
 
     c4,c5 = st.columns(2)
-    c4.metric("Pior média – culinária brasileira", worst_br['restaurant_name'].iloc[0] if len(worst_br) else "—")
-    c5.metric("Melhor média – culinária brasileira no Brasil", best_br_in_brazil['restaurant_name'].iloc[0] if len(best_br_in_brazil) else "—")
+    c4.metric("Pior média – culinária brasileira", r['worst_br'])
+    c5.metric("Melhor média – culinária brasileira no Brasil", r['best_br_in_brazil'])
 
     st.divider()
     colA, colB = st.columns(2)
     with colA:
         st.markdown("**Média de avaliações (votes)** – Online vs. Não Online")
-        st.bar_chart(online_mean_votes)
+        st.bar_chart(r['online_mean_votes'])
         st.caption("Pergunta 6: comparação direta das médias.")
     with colB:
-        st.markdown("**Preço médio p/ dois** – Com reserva vs. Sem reserva")
-        st.bar_chart(booking_mean_price)
+        st.markdown(f"**Preço médio p/ dois ({currency})** – Com reserva vs. Sem reserva")
+        st.bar_chart(r['booking_mean_price'])
         st.caption("Pergunta 7: comparação direta das médias.")
 
     st.divider()
     colC, colD = st.columns(2)
     with colC:
-        st.markdown("**Preço médio p/ dois (EUA)** – Japonesa vs. BBQ")
+        st.markdown(f"**Preço médio p/ dois em {currency} (EUA)** – Japonesa vs. BBQ")
         cmp_df = pd.DataFrame({
             'Categoria': ['Japonesa (EUA)','BBQ (EUA)'],
             'Preço médio p/ dois': [japanese_mean_price, bbq_mean_price]
@@ -381,58 +473,35 @@ with tab_rest:
 
     with colD:
         st.markdown("**Top 10 – Restaurantes com mais avaliações**")
-        st.dataframe(g[['restaurant_name','country','city','votes']].sort_values('votes', ascending=False).head(10), use_container_width=True)
+        st.dataframe(r['top10_votes'], use_container_width=True)
 
 # ============================= TIPOS DE CULINÁRIA ============================
-with tab_cuisine:
+with tab_cuisine, profiler.stage("render:Tipos de Culinária"):
     st.subheader("🍜 Análises por Tipo de Culinária")
-    g = df_f.copy()
-
-    # Explode para trabalhar por restaurante x culinária
-    exp = g[['restaurant_id','restaurant_name','country','city','aggregate_rating','average_cost_for_two','has_online_delivery','is_delivering_now','cuisines_list']].explode('cuisines_list').dropna(subset=['cuisines_list'])
-    exp['cuisine'] = exp['cuisines_list'].astype(str)
-
-    def top_bottom_by_cuisine(cname):
-        sub = exp.loc[exp['cuisine'].str.lower()==cname.strip().lower()].copy()
-        top_row = sub.sort_values('aggregate_rating', ascending=False).head(1)
-        bottom_row = sub.sort_values('aggregate_rating', ascending=True).head(1)
-        return top_row, bottom_row
+    r = results["Tipos de Culinária"]
+    cuisine_price_mean = r['cuisine_price_mean']
+    cuisine_rating_mean = r['cuisine_rating_mean']
+    cuisine_online_delivery = r['cuisine_online_delivery']
 
     # 1-10) Top/Bottom por culinárias específicas
-    targets = [
-        ("Italiana","italian"), ("Americana","american"), ("Árabe","arabian"),
-        ("Japonesa","japanese"), ("Caseira","home food")
-    ]
-
     cols = st.columns(2)
-    for i,(label, key) in enumerate(targets, start=1):
-        top_row, bottom_row = top_bottom_by_cuisine(label)
+    for i,(label, top_name, bottom_name) in enumerate(r['top_bottom'], start=1):
         with cols[i%2]:
             st.markdown(f"**{label}**")
-            st.write("Maior média:", top_row['restaurant_name'].iloc[0] if len(top_row) else "—")
-            st.write("Menor média:", bottom_row['restaurant_name'].iloc[0] if len(bottom_row) else "—")
+            st.write("Maior média:", top_name)
+            st.write("Menor média:", bottom_name)
 
     st.divider()
 
-    # 11) Tipo de culinária com maior valor médio de prato p/ dois
-    cuisine_price_mean = exp.groupby('cuisine')['average_cost_for_two'].mean().sort_values(ascending=False)
-
-    # 12) Tipo de culinária com maior nota média
-    cuisine_rating_mean = exp.groupby('cuisine')['aggregate_rating'].mean().sort_values(ascending=False)
-
-    # 13) Tipo de culinária com mais restaurantes que aceitam pedidos online e fazem entregas
-    online_delivery_and_now = exp.loc[exp['has_online_delivery'] & g.loc[exp.index, 'is_delivering_now']]
-    cuisine_online_delivery = online_delivery_and_now.groupby('cuisine')['restaurant_id'].nunique().sort_values(ascending=False)
-
     c1,c2,c3 = st.columns(3)
-    c1.metric("Culinária mais cara (média p/ dois)", cuisine_price_mean.index[0] if len(cuisine_price_mean) else "—")
-    c2.metric("Culinária com maior nota média", cuisine_rating_mean.index[0] if len(cuisine_rating_mean) else "—")
-    c3.metric("Mais restaurantes online+entrega", cuisine_online_delivery.index[0] if len(cuisine_online_delivery) else "—")
+    c1.metric("Culinária mais cara (média p/ dois)", top_label(cuisine_price_mean))
+    c2.metric("Culinária com maior nota média", top_label(cuisine_rating_mean))
+    c3.metric("Mais restaurantes online+entrega", top_label(cuisine_online_delivery))
 
     st.divider()
     colA, colB, colC = st.columns(3)
     with colA:
-        st.markdown("**Preço médio p/ dois por culinária (top 15)**")
+        st.markdown(f"**Preço médio p/ dois ({currency}) por culinária (top 15)**")
         st.bar_chart(cuisine_price_mean.head(15))
     with colB:
         st.markdown("**Nota média por culinária (top 15)**")
@@ -441,5 +510,140 @@ with tab_cuisine:
         st.markdown("**Online + Entregas por culinária (top 15)**")
         st.bar_chart(cuisine_online_delivery.head(15))
 
+# ============================= MAPA ===========================================
+# Limite de marcadores enviados ao navegador por renderização
+MAX_MARKERS = 1500
+
+
+def cluster_marker(row, names: pd.Series):
+    """CircleMarker de um cluster; cluster de um restaurante só mostra o nome."""
+    n = int(row.restaurantes)
+    nota = "—" if pd.isna(row.nota_media) else f"{row.nota_media:.2f}"
+    label = (f"{names.iloc[int(row.linha)]} · nota {nota}" if n == 1
+             else f"{n} restaurantes · nota média {nota}")
+    return folium.CircleMarker(
+        location=(row.latitude, row.longitude), radius=5 + 3 * math.log2(n), tooltip=label,
+        color="#c0392b", weight=1, fill=True, fill_opacity=0.6,
+    )
+
+
+with tab_mapa, profiler.stage("render:Mapa"):
+    st.subheader("🗺️ Mapa de Restaurantes")
+    r = results["Mapa"]
+    grid = load_grid_index(digest, schema_key(), df)
+
+    if r['pontos'] == 0:
+        st.info("Nenhum restaurante do filtro tem coordenadas válidas.")
+    else:
+        view = st.session_state.setdefault("mapa_view", {"zoom": 2, "center": None, "bounds": None})
+        zoom = int(view["zoom"])
+        if view["center"] is None:
+            top = r['clusters'][PRECLUSTER_MAX_ZOOM].iloc[0]
+            view["center"] = (float(top.latitude), float(top.longitude))
+
+        # Clusters pré-calculados até PRECLUSTER_MAX_ZOOM; acima, só os pontos da janela
+        bounds = view["bounds"] or (-90.0, -180.0, 90.0, 180.0)
+        if zoom <= PRECLUSTER_MAX_ZOOM:
+            visible = clusters_in_bounds(r['clusters'][zoom], *bounds)
+        else:
+            pos = grid.in_bounds(*bounds)
+            if rows is not None:
+                pos = pos[isin_sorted(pos, rows)]
+            visible = cluster_points(
+                df['latitude'].to_numpy()[pos], df['longitude'].to_numpy()[pos],
+                df['aggregate_rating'].to_numpy()[pos], pos, zoom,
+            )
+
+        # Consulta por raio (clique no mapa escolhe o ponto)
+        # Os campos são só do Session State (sem value=), para o clique poder reescrevê-los
+        st.session_state.setdefault("mapa_lat", view["center"][0])
+        st.session_state.setdefault("mapa_lon", view["center"][1])
+        if "mapa_clique" in st.session_state:
+            st.session_state["mapa_lat"], st.session_state["mapa_lon"] = st.session_state.pop("mapa_clique")
+        q1, q2, q3 = st.columns(3)
+        q_lat = q1.number_input("Latitude", -90.0, 90.0, format="%.5f", key="mapa_lat")
+        q_lon = q2.number_input("Longitude", -180.0, 180.0, format="%.5f", key="mapa_lon")
+        q_km = q3.number_input("Raio (km)", min_value=0.1, max_value=20000.0, value=5.0, step=1.0)
+        near, dist = grid.within(q_lat, q_lon, q_km, rows)
+
+        fmap = folium.Map(location=view["center"], zoom_start=zoom)
+        layer = folium.FeatureGroup(name="clusters")
+        names = df['restaurant_name']
+        for row in visible.head(MAX_MARKERS).itertuples(index=False):
+            layer.add_child(cluster_marker(row, names))
+        layer.add_child(folium.Circle((q_lat, q_lon), radius=q_km * 1000, color="#2c3e50", fill=False))
+        out = st_folium(
+            fmap, key="mapa", center=view["center"], zoom=zoom, feature_group_to_add=layer,
+            returned_objects=["zoom", "bounds", "center", "last_clicked"], height=520, use_container_width=True,
+        ) or {}
+        st.caption(
+            f"{r['pontos']} restaurantes no mapa ({r['sem_coordenadas']} sem coordenadas) · "
+            f"{min(len(visible), MAX_MARKERS)} marcadores de {len(visible)} clusters na janela, zoom {zoom}."
+        )
+
+        # A janela mudou: guarda e renderiza os clusters do novo zoom/área
+        new_bounds = out.get("bounds") or {}
+        new_center = out.get("center") or {}
+        if out.get("zoom") is not None and new_bounds.get("_southWest") and new_center:
+            sw, ne = new_bounds["_southWest"], new_bounds["_northEast"]
+            new_view = {
+                "zoom": int(out["zoom"]),
+                "center": (new_center["lat"], new_center["lng"]),
+                "bounds": (sw["lat"], sw["lng"], ne["lat"], ne["lng"]),
+            }
+            if new_view["zoom"] != view["zoom"] or new_view["bounds"] != view["bounds"]:
+                st.session_state["mapa_view"] = new_view
+                rerun()
+        clicked = out.get("last_clicked")
+        if clicked and (clicked["lat"], clicked["lng"]) != st.session_state.get("mapa_ultimo_clique"):
+            st.session_state["mapa_ultimo_clique"] = (clicked["lat"], clicked["lng"])
+            st.session_state["mapa_clique"] = (clicked["lat"], clicked["lng"])
+            rerun()
+
+        st.markdown(f"**{len(near)} restaurantes a até {q_km:g} km** de ({q_lat:.4f}, {q_lon:.4f})")
+        if len(near):
+            st.dataframe(pd.DataFrame({
+                'restaurante': df['restaurant_name'].to_numpy()[near],
+                'cidade': df['city'].to_numpy()[near],
+                'nota': df['aggregate_rating'].to_numpy()[near],
+                'distancia_km': dist.round(2),
+            }).head(100), use_container_width=True)
+
+with st.sidebar.expander("⏱️ Tempo de cálculo por aba"):
+    if memo_hit:
+        st.caption("Resultado reaproveitado da memória (tempos do cálculo original).")
+    st.caption(
+        f"Resultados por filtro: {len(memo)} guardados, {memo.nbytes / 2**20:.1f} MB"
+        f" · {memo.hits} hits / {memo.misses} misses"
+    )
+    timing = pd.Series(tab_seconds, name="segundos").sort_values(ascending=False)
+    st.dataframe(timing.round(4), use_container_width=True)
+    st.caption(
+        f"Total (parede): {compute_seconds:.3f}s · soma das abas: {timing.sum():.3f}s · "
+        f"caminho crítico: {timing.index[0]} ({timing.iloc[0]:.3f}s)"
+    )
+
+if probe.enabled:
+    with st.sidebar.expander("📏 Memória por aba", expanded=True):
+        st.dataframe(pd.DataFrame(probe.records).set_index("bloco").round(1), use_container_width=True)
+
+if profiler.enabled:
+    meta = {"digest": digest[:12], "linhas": len(df), "linhas_filtradas": len(df) if rows is None else len(rows),
+            "memo_hit": memo_hit}
+    if os.environ.get(PROFILE_ENV):
+        enable_logging()
+        profiler.log(**meta)
+    with st.sidebar.expander("🐞 Etapas deste rerun"):
+        st.caption(
+            f"{meta['linhas_filtradas']} de {meta['linhas']} linhas no filtro"
+            + (" · cálculo reaproveitado da memória" if memo_hit else "")
+        )
+        st.dataframe(pd.DataFrame(profiler.records()).set_index("etapa").round(4), use_container_width=True)
+        st.download_button("Exportar JSON", profiler.to_json(**meta), file_name="etapas.json",
+                           mime="application/json")
+
+# Fim do rerun: tracemalloc do modo debug não fica ligado para os próximos
+profiler.close()
+
 st.divider()
 st.caption("© ZF Restaurantes – Dashboard v1 | Esta versão responde diretamente às questões listadas, respeitando filtros aplicados.")
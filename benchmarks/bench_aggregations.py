@@ -0,0 +1,107 @@
+# ZF Restaurantes – Benchmark das agregações por País/Cidade
+# -------------------------------------------------------------
+# Compara a cadeia original de groupbys das abas País e Cidade com
+# aggregations.group_metrics (uma passada por chave), verificando antes
+# que os rankings são os mesmos.
+#
+# Uso:
+#   python benchmarks/bench_aggregations.py
+#   python benchmarks/bench_aggregations.py --rows 10000,1000000
+# -------------------------------------------------------------
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aggregations import CITY_METRICS, COUNTRY_METRICS, group_metrics, ranking  # noqa: E402
+from bench_prepare import DEFAULT_CSV, synthetic_frame  # noqa: E402
+from cuisine_index import CuisineIndex  # noqa: E402
+from data_prep import prepare_dataframe  # noqa: E402
+from pricing import PRICE_COLUMN  # noqa: E402
+
+
+def country_chain(g: pd.DataFrame) -> dict:
+    """Cadeia original da aba País (v1)."""
+    by = g.groupby('country', observed=True)
+    df_c = g[['country','cuisines_list']].explode('cuisines_list')
+    return {
+        'cidades': by['city'].nunique(),
+        'restaurantes': by['restaurant_id'].nunique(),
+        'restaurantes_preco4': g.loc[g['price_range'] == 4].groupby('country', observed=True)['restaurant_id'].nunique(),
+        'culinarias': df_c.dropna().groupby('country', observed=True)['cuisines_list'].nunique(),
+        'votos': by['votes'].sum(),
+        'restaurantes_entregando': g.loc[g['is_delivering_now']].groupby('country', observed=True)['restaurant_id'].nunique(),
+        'restaurantes_reserva': g.loc[g['has_table_booking']].groupby('country', observed=True)['restaurant_id'].nunique(),
+        'media_votos': by.apply(lambda x: x['votes'].mean()),
+        'nota_media': by['aggregate_rating'].mean(),
+        'preco_medio_para_dois': by[PRICE_COLUMN].mean(),
+    }
+
+
+def city_chain(g: pd.DataFrame) -> dict:
+    """Cadeia original da aba Cidade (v1)."""
+    by = g.groupby('city', observed=True)
+    df_c = g[['city','cuisines_list']].explode('cuisines_list')
+    return {
+        'restaurantes': by['restaurant_id'].nunique(),
+        'restaurantes_nota_maior4': g.loc[g['aggregate_rating'] > 4].groupby('city', observed=True)['restaurant_id'].nunique(),
+        'restaurantes_nota_menor25': g.loc[g['aggregate_rating'] < 2.5].groupby('city', observed=True)['restaurant_id'].nunique(),
+        'preco_medio_para_dois': by[PRICE_COLUMN].mean(),
+        'culinarias': df_c.dropna().groupby('city', observed=True)['cuisines_list'].nunique(),
+        'restaurantes_reserva': g.loc[g['has_table_booking']].groupby('city', observed=True)['restaurant_id'].nunique(),
+        'restaurantes_entregando': g.loc[g['is_delivering_now']].groupby('city', observed=True)['restaurant_id'].nunique(),
+        'restaurantes_online': g.loc[g['has_online_delivery']].groupby('city', observed=True)['restaurant_id'].nunique(),
+    }
+
+
+def engine(g: pd.DataFrame, cidx: CuisineIndex):
+    return (group_metrics(g, 'country', COUNTRY_METRICS, cidx),
+            group_metrics(g, 'city', CITY_METRICS, cidx))
+
+
+def assert_parity(g: pd.DataFrame, cidx: CuisineIndex) -> None:
+    pais, cidade = engine(g, cidx)
+    for frame, chain in ((pais, country_chain(g)), (cidade, city_chain(g))):
+        for name, ref in chain.items():
+            got = ranking(frame, name)
+            # Médias podem diferir no último dígito (empates trocam de lugar): compara por rótulo
+            assert got.is_monotonic_decreasing, f"ranking fora de ordem em {name}"
+            assert sorted(map(str, got.index)) == sorted(map(str, ref.index)), f"grupos diferentes em {name}"
+            np.testing.assert_allclose(got.sort_index().to_numpy(dtype=float),
+                                       ref.sort_index().to_numpy(dtype=float), err_msg=name)
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das agregações por País/Cidade")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--rows", default="10000,100000,1000000",
+                        help="tamanhos separados por vírgula")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)
+
+    base = pd.read_csv(args.csv)
+    print(f"{'linhas':>10} {'groupbys (s)':>14} {'motor (s)':>11} {'speedup':>9}")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        df = prepare_dataframe(synthetic_frame(base, rows))
+        cidx = CuisineIndex.build(df['cuisines'])
+        assert_parity(df, cidx)
+        t_ref = timed(lambda d: (country_chain(d), city_chain(d)), df)
+        t_new = timed(engine, df, cidx)
+        print(f"{rows:>10} {t_ref:>14.3f} {t_new:>11.3f} {t_ref / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# ZF Restaurantes – Benchmark da tabela ponte restaurante x culinária
+# -------------------------------------------------------------
+# Compara o caminho original das abas (explode de cuisines_list no recorte
+# filtrado + groupby por nome) com a tabela ponte do CuisineIndex
+# (CuisineIndex.bridge): culinárias distintas (Geral), culinárias por
+# país/cidade e médias/ranking por culinária (Tipos de Culinária).
+# Verifica antes que os resultados são iguais, sem filtro e com filtro,
+# num dataset sintético com várias culinárias por restaurante.
+#
+# Uso:
+#   python benchmarks/bench_bridge.py --rows 10000,1000000
+# -------------------------------------------------------------
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aggregations import CITY_METRICS, COUNTRY_METRICS, group_metrics  # noqa: E402
+from analytics import compute_culinaria, compute_geral, filter_rows  # noqa: E402
+from cuisine_index import CuisineIndex  # noqa: E402
+from data_prep import prepare_dataframe  # noqa: E402
+from hierarchy import LocationIndex  # noqa: E402
+from pricing import PRICE_COLUMN  # noqa: E402
+from synthetic import zomato_frame  # noqa: E402
+
+
+def explode_chain(df: pd.DataFrame, rows) -> dict:
+    """Cálculos originais (v1) sobre o explode, mantidos só como referência de paridade."""
+    g = df if rows is None else df.iloc[rows]
+    exp = g[['country','city','restaurant_id','aggregate_rating',PRICE_COLUMN,
+             'has_online_delivery','is_delivering_now','cuisines_list']].explode('cuisines_list').dropna(subset=['cuisines_list'])
+    exp['cuisine'] = exp['cuisines_list'].astype(str)
+    # Culinária repetida na mesma linha conta uma vez (como na ponte)
+    exp = exp.reset_index().drop_duplicates(['index', 'cuisine'])
+    online = exp.loc[exp['has_online_delivery'] & exp['is_delivering_now']]
+    return {
+        'culinarias': len({c for lst in g['cuisines_list'] for c in lst}),
+        'pais_culinarias': exp.groupby('country', observed=True)['cuisine'].nunique(),
+        'cidade_culinarias': exp.groupby('city', observed=True)['cuisine'].nunique(),
+        'cuisine_price_mean': exp.groupby('cuisine')[PRICE_COLUMN].mean(),
+        'cuisine_rating_mean': exp.groupby('cuisine')['aggregate_rating'].mean(),
+        'cuisine_online_delivery': online.groupby('cuisine')['restaurant_id'].nunique(),
+    }
+
+
+def bridge_path(df: pd.DataFrame, rows, cidx: CuisineIndex) -> dict:
+    """Mesmos resultados pelas funções das abas (o tempo inclui o top/bottom de compute_culinaria)."""
+    g = df if rows is None else df.iloc[rows]
+    cul = compute_culinaria(df, rows, cidx)
+    return {
+        'culinarias': compute_geral(df, rows, cidx)['culinarias'],
+        'pais_culinarias': group_metrics(g, 'country', COUNTRY_METRICS[3:4], cidx)['culinarias'],
+        'cidade_culinarias': group_metrics(g, 'city', CITY_METRICS[4:5], cidx)['culinarias'],
+        'cuisine_price_mean': cul['cuisine_price_mean'],
+        'cuisine_rating_mean': cul['cuisine_rating_mean'],
+        'cuisine_online_delivery': cul['cuisine_online_delivery'],
+    }
+
+
+def assert_same(ref: dict, new: dict) -> None:
+    assert ref['culinarias'] == new['culinarias'], "culinarias"
+    for key in ref:
+        if key == 'culinarias':
+            continue
+        a, b = ref[key].sort_index(), new[key].dropna().sort_index()
+        assert [str(i) for i in a.index] == [str(i) for i in b.index], f"{key}: grupos diferentes"
+        np.testing.assert_allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), err_msg=key)
+
+
+def measure(func, *args):
+    """(segundos, pico alocado em MB); o pico vem de uma segunda execução sob tracemalloc."""
+    t0 = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - t0
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da tabela ponte restaurante x culinária")
+    parser.add_argument("--rows", default="10000,1000000", help="tamanhos separados por vírgula")
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'filtro':>8} {'explode (s)':>12} {'ponte (s)':>10} {'speedup':>8} "
+          f"{'explode (MB)':>13} {'ponte (MB)':>11}")
+    for rows_n in [int(r) for r in args.rows.split(",")]:
+        df = prepare_dataframe(zomato_frame(rows_n))
+        cidx = CuisineIndex.build(df['cuisines'])
+        loc = LocationIndex.build(df)
+        top = df['country'].value_counts().index[0]
+        selections = {
+            'nenhum': None,
+            'país': filter_rows(loc, cidx, [top], loc.cities_for([top]), []),
+        }
+        for label, rows in selections.items():
+            assert_same(explode_chain(df, rows), bridge_path(df, rows, cidx))
+            t_ref, m_ref = measure(explode_chain, df, rows)
+            t_new, m_new = measure(bridge_path, df, rows, cidx)
+            print(f"{rows_n:>10} {label:>8} {t_ref:>12.3f} {t_new:>10.3f} {t_ref / t_new:>7.1f}x "
+                  f"{m_ref:>13.1f} {m_new:>11.1f}")
+    print("paridade OK (explode = tabela ponte, com e sem filtro)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# ZF Restaurantes – Benchmark do índice espacial e dos clusters do mapa
+# -------------------------------------------------------------
+# Gera N pontos a partir das coordenadas reais (com ruído de ~2 km) e
+# compara a busca "num raio de N km" pelo índice em grade
+# (geo.GridIndex.within) com haversine sobre todos os pontos, verificando
+# antes que os resultados são idênticos. Mede também o pré-agrupamento
+# por zoom (geo.cluster_pyramid) e quantos marcadores cada nível envia.
+#
+# Uso:
+#   python benchmarks/bench_geo.py --rows 1000000
+# -------------------------------------------------------------
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from haversine import Unit, haversine_vector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import geo  # noqa: E402
+from bench_prepare import DEFAULT_CSV, synthetic_frame  # noqa: E402
+
+RADII_KM = [1, 5, 25, 200]
+
+
+def synthetic_points(base: pd.DataFrame, rows: int, seed: int = 0):
+    """Coordenadas reais reamostradas + ruído gaussiano (~2 km)."""
+    rng = np.random.default_rng(seed)
+    sample = synthetic_frame(base, rows, seed)
+    lat = np.clip(sample['latitude'].to_numpy() + rng.normal(0, 0.02, rows), -90, 90)
+    lon = np.clip(sample['longitude'].to_numpy() + rng.normal(0, 0.02, rows), -180, 180)
+    return lat, lon, sample['aggregate_rating'].to_numpy(dtype=float)
+
+
+def brute_force(lat, lon, point, km):
+    dist = haversine_vector([point], np.column_stack([lat, lon]), Unit.KILOMETERS, comb=True).ravel()
+    return np.flatnonzero(dist <= km)
+
+
+def timed(func, *args, repeat: int = 1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice espacial")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    lat, lon, rating = synthetic_points(pd.read_csv(args.csv), args.rows)
+    index, t_build = timed(geo.GridIndex.build, lat, lon)
+    print(f"{args.rows} pontos · índice em grade: {t_build:.2f}s ({len(index.keys)} células ocupadas)")
+
+    rng = np.random.default_rng(1)
+    centers = rng.integers(0, args.rows, size=args.queries)
+    print(f"{'raio (km)':>10} {'achados (média)':>16} {'haversine total (ms)':>21} {'índice (ms)':>12} {'speedup':>9}")
+    for km in RADII_KM:
+        t_full = t_index = found = 0.0
+        for c in centers:
+            point = (lat[c], lon[c])
+            expected, t = timed(brute_force, lat, lon, point, km)
+            t_full += t
+            (got, _), t = timed(index.within, point[0], point[1], km)
+            t_index += t
+            assert np.array_equal(np.sort(got), expected), f"resultado diferente (raio {km} km)"
+            found += len(got)
+        n = len(centers)
+        print(f"{km:>10} {found / n:>16.0f} {t_full / n * 1e3:>21.1f} {t_index / n * 1e3:>12.2f} "
+              f"{t_full / t_index:>8.0f}x")
+    print("paridade OK (índice = haversine em todos os pontos)")
+
+    positions = np.arange(args.rows)
+    levels, t_pyramid = timed(geo.cluster_pyramid, lat, lon, rating, positions)
+    print(f"clusters por zoom (0..{geo.PRECLUSTER_MAX_ZOOM}) pré-calculados em {t_pyramid:.2f}s")
+    for zoom in (0, 4, 8, geo.PRECLUSTER_MAX_ZOOM):
+        direct = geo.cluster_points(lat, lon, rating, positions, zoom)
+        assert direct['restaurantes'].sum() == args.rows and len(direct) == len(levels[zoom])
+        print(f"  zoom {zoom:>2}: {len(levels[zoom]):>8} clusters (em vez de {args.rows} marcadores)")
+
+    # Zoom acima do pré-cálculo: só os pontos da janela visível
+    c = centers[0]
+    south, west, north, east = lat[c] - 0.05, lon[c] - 0.08, lat[c] + 0.05, lon[c] + 0.08
+    (pos, clusters), t_view = timed(
+        lambda: (lambda p: (p, geo.cluster_points(lat[p], lon[p], rating[p], p, 14)))(
+            index.in_bounds(south, west, north, east)), repeat=5)
+    expected = np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))
+    assert np.array_equal(pos, expected)
+    print(f"janela no zoom 14: {len(pos)} pontos -> {len(clusters)} clusters em {t_view * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
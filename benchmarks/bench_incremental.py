@@ -0,0 +1,169 @@
+# ZF Restaurantes – Consistência e custo das atualizações incrementais
+# -------------------------------------------------------------
+# Gera deltas (inserts, updates e deletes por restaurant_id, incluindo
+# cidades e culinárias novas) sobre um CSV sintético e compara, a cada
+# rodada, o caminho incremental (incremental.update) com a reconstrução
+# completa (aplicar o delta ao CSV bruto + prepare_dataframe + groupbys):
+# a tabela, as agregações mantidas e os resultados das abas precisam ser
+# iguais. Depois mede o tempo de cada caminho.
+#
+# Uso:
+#   python benchmarks/bench_incremental.py --rows 1000000 --changes 5000 --rounds 3
+# -------------------------------------------------------------
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import incremental  # noqa: E402
+from aggregations import CITY_METRICS, COUNTRY_METRICS, group_metrics  # noqa: E402
+from analytics import run_tabs  # noqa: E402
+from bench_prepare import DEFAULT_CSV, synthetic_frame  # noqa: E402
+from cuisine_index import CuisineIndex  # noqa: E402
+from data_prep import prepare_dataframe  # noqa: E402
+from pricing import PRICE_COLUMN  # noqa: E402
+
+KEY = 'restaurant_id'
+
+
+def make_delta(raw: pd.DataFrame, changes: int, next_id: int, seed: int) -> pd.DataFrame:
+    """~1/3 de updates, deletes e inserts (com uma cidade e uma culinária que não existiam)."""
+    rng = np.random.default_rng(seed)
+    n_each = max(changes // 3, 1)
+    picked = rng.choice(len(raw), size=2 * n_each, replace=False)
+    donors = raw.iloc[rng.integers(0, len(raw), size=2 * n_each)].reset_index(drop=True)
+
+    updates = raw.iloc[picked[:n_each]].reset_index(drop=True)
+    for col in ['votes', 'aggregate_rating', 'average_cost_for_two', 'cuisines', 'city', 'country',
+                'has_online_delivery', 'is_delivering_now', 'latitude', 'longitude']:
+        updates[col] = donors[col].iloc[:n_each].to_numpy()
+    updates.loc[0, 'city'] = f"Cidade Nova {seed}"
+
+    deletes = raw.iloc[picked[n_each:]][[KEY]].reset_index(drop=True)
+
+    inserts = donors.iloc[n_each:].reset_index(drop=True)
+    inserts[KEY] = np.arange(next_id, next_id + len(inserts))
+    inserts.loc[0, 'cuisines'] = f"Culinária Nova {seed}, Italian"
+
+    return pd.concat([updates.assign(op='update'), deletes.assign(op='delete'), inserts.assign(op='insert')],
+                     ignore_index=True)
+
+
+def rebuild_csv(raw: pd.DataFrame, delta: pd.DataFrame) -> str:
+    """O CSV completo com o delta aplicado: updates no lugar, deletes fora, inserts no fim."""
+    rows = delta.loc[delta['op'] != 'delete'].drop(columns='op')
+    # As linhas de delete (só com a chave) tornam float as colunas inteiras do delta
+    rows = rows.astype({c: t for c, t in raw.dtypes.items() if t.kind == 'i' and rows[c].notna().all()})
+    ops = delta.loc[rows.index, 'op']
+    ids = pd.Index(raw[KEY])
+    out = raw.astype(object)
+    updates = rows[ops == 'update']
+    out.iloc[ids.get_indexer(updates[KEY]), :] = updates[out.columns].astype(object).to_numpy()
+    keep = np.ones(len(out), dtype=bool)
+    keep[ids.get_indexer(delta.loc[delta['op'] == 'delete', KEY].astype(raw[KEY].dtype))] = False
+    out = pd.concat([out[keep], rows[ops == 'insert'][out.columns].astype(object)], ignore_index=True)
+    return out.to_csv(index=False)
+
+
+def assert_close_frames(x: pd.DataFrame, y: pd.DataFrame, what: str) -> None:
+    assert [str(i) for i in x.index] == [str(i) for i in y.index], f"{what}: grupos diferentes"
+    for col in y.columns:
+        assert x[col].dtype == y[col].dtype, f"{what}.{col}: {x[col].dtype} != {y[col].dtype}"
+        np.testing.assert_allclose(x[col].to_numpy(dtype=float, na_value=np.nan),
+                                   y[col].to_numpy(dtype=float, na_value=np.nan), err_msg=f"{what}.{col}")
+
+
+def assert_same_results(a, b, path: str = "") -> None:
+    """Resultados das abas iguais (valores numéricos com tolerância, rótulos exatos)."""
+    if isinstance(a, dict):
+        assert a.keys() == b.keys(), path
+        for k in a:
+            assert_same_results(a[k], b[k], f"{path}/{k}")
+    elif isinstance(a, (pd.Series, pd.DataFrame)):
+        # Empates podem trocar de lugar com diferenças de ponto flutuante: compara por rótulo
+        a, b = a.sort_index(), b.sort_index()
+        assert [str(i) for i in a.index] == [str(i) for i in b.index], path
+        if isinstance(a, pd.Series):
+            np.testing.assert_allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), err_msg=path)
+        else:
+            pd.testing.assert_frame_equal(a, b, check_dtype=False, obj=path)
+    elif isinstance(a, float) and np.isnan(a):
+        assert np.isnan(b), path
+    elif isinstance(a, float):
+        assert np.isclose(a, b), path
+    elif isinstance(a, list):
+        assert len(a) == len(b), path
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_same_results(x, y, f"{path}[{i}]")
+    elif isinstance(a, tuple):
+        assert a == b, path
+    else:
+        assert a == b, f"{path}: {a!r} != {b!r}"
+
+
+def full_rebuild(csv_text: str):
+    """Caminho de hoje: reler o CSV inteiro, preparar e agrupar tudo de novo."""
+    df = prepare_dataframe(pd.read_csv(io.StringIO(csv_text)))
+    cidx = CuisineIndex.build(df['cuisines'])
+    exp = df[[PRICE_COLUMN, 'cuisines_list']].explode('cuisines_list').dropna()
+    return df, cidx, [
+        group_metrics(df, 'country', COUNTRY_METRICS, cidx),
+        group_metrics(df, 'city', CITY_METRICS, cidx),
+        exp.groupby('cuisines_list')[PRICE_COLUMN].mean(),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consistência e custo das atualizações incrementais")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--changes", type=int, default=3_000, help="linhas alteradas por delta")
+    parser.add_argument("--rounds", type=int, default=3, help="deltas aplicados em sequência")
+    args = parser.parse_args()
+
+    raw = synthetic_frame(pd.read_csv(args.csv), args.rows)
+    raw[KEY] = np.arange(1, len(raw) + 1)
+    raw = pd.read_csv(io.StringIO(raw.to_csv(index=False)))
+    df = prepare_dataframe(raw.copy())
+    aggregates = incremental.Aggregates.build(df)
+    next_id = len(raw) + 1
+
+    print(f"{'rodada':>6} {'linhas':>9} {'incremental (s)':>16} {'reconstrução (s)':>17} {'speedup':>9}")
+    for r in range(1, args.rounds + 1):
+        delta = make_delta(raw, args.changes, next_id, seed=r)
+        next_id += len(delta)
+        buf = io.StringIO()
+        delta.to_csv(buf, index=False)
+
+        t0 = time.perf_counter()
+        df, aggregates, _ = incremental.update(df, aggregates, io.StringIO(buf.getvalue()))
+        t_inc = time.perf_counter() - t0
+
+        csv_text = rebuild_csv(raw, delta)
+        t0 = time.perf_counter()
+        rebuilt, cidx, (country, city, cuisine_price) = full_rebuild(csv_text)
+        t_full = time.perf_counter() - t0
+        raw = pd.read_csv(io.StringIO(csv_text))
+
+        pd.testing.assert_frame_equal(df, rebuilt)
+        assert_close_frames(aggregates.frame('country'), country, 'país')
+        assert_close_frames(aggregates.frame('city'), city, 'cidade')
+        assert_close_frames(aggregates.frame('cuisine')[['preco_medio_para_dois']],
+                            cuisine_price.rename('preco_medio_para_dois').to_frame(), 'culinária')
+        inc_results, _, _ = run_tabs(df, None, CuisineIndex.build(df['cuisines']), aggregates=aggregates)
+        full_results, _, _ = run_tabs(rebuilt, None, cidx)
+        inc_results.pop("Mapa"), full_results.pop("Mapa")
+        assert_same_results(inc_results, full_results)
+        print(f"{r:>6} {len(df):>9} {t_inc:>16.3f} {t_full:>17.3f} {t_full / t_inc:>8.1f}x")
+    print("consistência OK (tabela, agregações e abas = reconstrução completa)")
+
+
+if __name__ == "__main__":
+    main()
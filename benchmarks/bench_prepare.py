@@ -0,0 +1,129 @@
+# ZF Restaurantes – Benchmark do prepare_dataframe
+# -------------------------------------------------------------
+# Compara a preparação vetorizada (data_prep.prepare_dataframe) com a
+# implementação original linha a linha (.apply), verificando antes que
+# os resultados são idênticos.
+#
+# Uso:
+#   python benchmarks/bench_prepare.py
+#   python benchmarks/bench_prepare.py --rows 10000,1000000 --csv dataset/new_zomato.csv
+# -------------------------------------------------------------
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from data_prep import (  # noqa: E402
+    CATEGORY_COLUMNS,
+    COORD_COLUMNS,
+    FLAG_COLUMNS,
+    RENAME_MAP,
+    _clean_cuisines,
+    _coerce_bool,
+    prepare_dataframe,
+)
+from pricing import PRICE_COLUMN, RATES_PER_USD  # noqa: E402
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "new_zomato.csv")
+
+
+def prepare_dataframe_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação original (v1), mantida aqui só como referência de paridade."""
+    df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns})
+    for col in ['restaurant_id','average_cost_for_two','aggregate_rating','votes','price_range']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in COORD_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64') if col in df.columns else np.nan
+    for col in FLAG_COLUMNS:
+        df[col] = df[col].apply(_coerce_bool)
+    for col in ['restaurant_name','country','city','currency']:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+    df['cuisines_list'] = df['cuisines'].apply(_clean_cuisines)
+    df[PRICE_COLUMN] = df['average_cost_for_two'] / df['currency'].map(lambda c: RATES_PER_USD.get(c, np.nan)).astype(float)
+    return df
+
+
+def assert_parity(raw: pd.DataFrame) -> None:
+    """Falha se a versão vetorizada divergir da original em qualquer coluna."""
+    ref = prepare_dataframe_rowwise(raw.copy())
+    new = prepare_dataframe(raw.copy())
+    assert list(ref.columns) == list(new.columns), "colunas diferentes"
+    for col in ref.columns:
+        a, b = ref[col], new[col]
+        if col in CATEGORY_COLUMNS or col == 'rating_text':
+            b = b.astype(object)
+            a = a.astype(object)
+        if col == 'cuisines_list':
+            assert a.tolist() == b.tolist(), f"divergência em {col}"
+            continue
+        pd.testing.assert_series_equal(a, b, check_dtype=col not in CATEGORY_COLUMNS + ['rating_text'], obj=col)
+
+
+def adversarial_frame() -> pd.DataFrame:
+    """Valores 'sujos' que exercitam todos os ramos de _coerce_bool/_clean_cuisines."""
+    flags = [1, 0, 2, -1, 0.5, 1.7, np.nan, True, False, "Yes", " y ", "NO", "sim", "1", "0", "true ", None]
+    n = len(flags)
+    return pd.DataFrame({
+        'Restaurant ID': range(n),
+        'Restaurant Name': [f" r{i} " for i in range(n)],
+        'Country Code': ["Brazil", " Brazil", "India ", None] * (n // 4) + ["India"] * (n % 4),
+        'City': ["A"] * n,
+        'Cuisines': ["Italian, Pizza", " ,Japanese,, ", None, "BBQ"] * (n // 4) + [""] * (n % 4),
+        'Average Cost for two': ["10"] * n,
+        'Currency': ["R$"] * n,
+        'Aggregate rating': [4.0] * n,
+        'Votes': [1] * n,
+        'Price range': [2] * n,
+        'Has Online delivery': flags,
+        'Is delivering now': pd.Series(flags, dtype=object).fillna(0).map(lambda v: v if isinstance(v, str) else int(v)),
+        'Has Table booking': [float(i % 3) for i in range(n)],
+    })
+
+
+def synthetic_frame(base: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """Reamostra o CSV real até `rows` linhas."""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(base), size=rows)
+    return base.iloc[idx].reset_index(drop=True)
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--rows", default="10000,1000000,10000000",
+                        help="tamanhos separados por vírgula")
+    parser.add_argument("--skip-rowwise-above", type=int, default=None,
+                        help="não roda a versão original acima deste número de linhas")
+    args = parser.parse_args()
+
+    assert_parity(adversarial_frame())
+    base = pd.read_csv(args.csv)
+    assert_parity(base)
+    print("paridade OK (dataset real + valores adversariais)")
+
+    print(f"{'linhas':>10} {'original (s)':>14} {'vetorizado (s)':>16} {'speedup':>9}")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        raw = synthetic_frame(base, rows)
+        t_new = timed(prepare_dataframe, raw.copy())
+        if args.skip_rowwise_above is not None and rows > args.skip_rowwise_above:
+            print(f"{rows:>10} {'—':>14} {t_new:>16.3f} {'—':>9}")
+            continue
+        t_ref = timed(prepare_dataframe_rowwise, raw.copy())
+        print(f"{rows:>10} {t_ref:>14.3f} {t_new:>16.3f} {t_ref / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
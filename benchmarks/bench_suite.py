@@ -0,0 +1,221 @@
+# ZF Restaurantes – Suíte de benchmarks do pipeline
+# -------------------------------------------------------------
+# Gera datasets sintéticos com o esquema de new_zomato.csv
+# (benchmarks/synthetic.py) em vários tamanhos e mede cada etapa do
+# pipeline do app: leitura do CSV, prepare_dataframe, índices de
+# culinária e de localização, filtro, recorte da tabela ponte
+# restaurante x culinária (CuisineIndex.bridge) e o cálculo
+# de cada aba (sem filtro e com um filtro típico). Cada tamanho roda num
+# processo próprio, para que o pico de RSS seja só dele (e um estouro de
+# memória em 10M não derrube os outros).
+#
+# O resultado vai para um JSON (padrão: benchmarks/results/<commit>.json)
+# e pode ser comparado com o de outro commit; --compare devolve código de
+# saída 1 se alguma etapa ficou mais lenta que o limite.
+#
+# Uso:
+#   python benchmarks/bench_suite.py --rows 10000,100000,1000000
+#   python benchmarks/bench_suite.py --rows 10000000 --repeat 1
+#   python benchmarks/bench_suite.py --compare benchmarks/results/abc1234.json
+# -------------------------------------------------------------
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+from analytics import TABS, TAB_FUNCTIONS, filter_rows  # noqa: E402
+from cuisine_index import CuisineIndex  # noqa: E402
+from data_prep import prepare_dataframe  # noqa: E402
+from hierarchy import LocationIndex  # noqa: E402
+from profiling import MemoryProbe, current_rss_bytes, peak_rss_bytes  # noqa: E402
+from synthetic import DEFAULT_CSV, zomato_frame  # noqa: E402
+
+RESULTS_DIR = os.path.join(HERE, "results")
+
+# Diferenças abaixo disso são ruído de relógio, não regressão
+MIN_DELTA_SECONDS = 0.005
+
+
+class Stages:
+    """Tempo (melhor de N), variação do RSS e, opcionalmente, alocações por etapa.
+
+    A variação é a do RSS atual durante a etapa (a maior entre as repetições);
+    o pico do processo (ru_maxrss) só cresce e fica só no total do tamanho.
+    """
+
+    def __init__(self, alloc: bool = False):
+        self.probe = MemoryProbe(enabled=alloc)
+        self.stages = {}
+
+    def run(self, name: str, func, *args):
+        rss = current_rss_bytes()
+        with self.probe.track(name):
+            t0 = time.perf_counter()
+            result = func(*args)
+            seconds = time.perf_counter() - t0
+        delta = round((current_rss_bytes() - rss) / 2**20, 1)
+        entry = self.stages.setdefault(name, {'segundos': seconds, 'rss_delta_mb': delta})
+        entry['segundos'] = min(entry['segundos'], seconds)
+        entry['rss_delta_mb'] = max(entry['rss_delta_mb'], delta)
+        if self.probe.records:
+            entry['alocado_pico_mb'] = round(self.probe.records.pop()['alocado_pico_mb'], 1)
+        return result
+
+
+def typical_filter(loc: LocationIndex, cidx: CuisineIndex):
+    """País mais frequente, suas 5 primeiras cidades e as 2 culinárias mais comuns."""
+    sizes = pd.Series(loc.ends - loc.starts)
+    country = str(sizes.groupby(loc.pair_country).sum().idxmax())
+    in_country = sizes[loc.pair_country == country].sort_values(ascending=False, kind="stable")
+    cities = [str(c) for c in loc.pair_city[in_country.index[:5]]]
+    counts = np.diff(cidx.offsets)
+    cuisines = [str(cidx.names[i]) for i in np.argsort(-counts)[:2]]
+    return [country], cities, cuisines
+
+
+def run_size(rows: int, seed: int, repeat: int, alloc: bool) -> dict:
+    """Pipeline completo num tamanho; roda no processo filho."""
+    base = pd.read_csv(DEFAULT_CSV)
+    t0 = time.perf_counter()
+    raw = zomato_frame(rows, seed=seed, base=base)
+    generated = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "zomato.csv")
+        raw.to_csv(path, index=False)
+        csv_mb = os.path.getsize(path) / 2**20
+        del raw
+
+        st = Stages(alloc)
+        for _ in range(repeat):
+            raw = st.run("leitura_csv", pd.read_csv, path)
+            df = st.run("prepare_dataframe", prepare_dataframe, raw)
+            del raw
+            cidx = st.run("indice_culinarias", CuisineIndex.build, df['cuisines'])
+            loc = st.run("indice_local", LocationIndex.build, df)
+            countries, cities, cuisines = typical_filter(loc, cidx)
+            rows_f = st.run("filtro", filter_rows, loc, cidx, countries, cities, cuisines)
+            st.run("ponte_culinarias", cidx.bridge, rows_f)
+            for tab in TABS:
+                st.run(f"aba:{tab}", TAB_FUNCTIONS[tab], df, None, cidx)
+                st.run(f"aba_filtrada:{tab}", TAB_FUNCTIONS[tab], df, rows_f, cidx)
+            del df, cidx, loc
+
+    return {
+        'linhas': rows,
+        'linhas_filtradas': int(len(rows_f)),
+        'filtro': {'paises': countries, 'cidades': cities, 'culinarias': cuisines},
+        'csv_mb': round(csv_mb, 1),
+        'geracao_segundos': round(generated, 3),
+        'rss_pico_mb': round(peak_rss_bytes() / 2**20, 1),
+        'etapas': {k: {**v, 'segundos': round(v['segundos'], 5)} for k, v in st.stages.items()},
+    }
+
+
+def git_commit() -> dict:
+    def git(*args):
+        try:
+            out = subprocess.run(["git", *args], cwd=HERE, capture_output=True, text=True, timeout=30)
+        except OSError:
+            return ""
+        return out.stdout.strip() if out.returncode == 0 else ""
+    return {'commit': git("rev-parse", "--short", "HEAD") or None,
+            'alterado': bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def environment() -> dict:
+    return {
+        'data': datetime.datetime.now().isoformat(timespec="seconds"),
+        **git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    """Imprime novo/antigo por etapa e devolve quantas etapas regrediram."""
+    regressions = 0
+    print(f"\ncomparação com {old['ambiente'].get('commit')} (limite {threshold:.2f}x)")
+    if old['parametros'].get('alloc') != new['parametros'].get('alloc'):
+        print("aviso: só uma das rodadas usou --alloc; os tempos não são comparáveis")
+    print(f"{'linhas':>10} {'etapa':<34} {'antes (s)':>10} {'agora (s)':>10} {'razão':>7}")
+    for size, result in new['tamanhos'].items():
+        before = old['tamanhos'].get(size)
+        if not before or 'etapas' not in before or 'etapas' not in result:
+            continue
+        for stage, entry in result['etapas'].items():
+            if stage not in before['etapas']:
+                continue
+            a, b = before['etapas'][stage]['segundos'], entry['segundos']
+            ratio = b / a if a > 0 else float("inf")
+            slower = ratio > threshold and b - a > MIN_DELTA_SECONDS
+            regressions += slower
+            print(f"{size:>10} {stage:<34} {a:>10.4f} {b:>10.4f} {ratio:>6.2f}x{'  REGRESSÃO' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do pipeline")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="tamanhos separados por vírgula (até 10000000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por tamanho (vale o menor tempo)")
+    parser.add_argument("--alloc", action="store_true",
+                        help="mede alocações por etapa com tracemalloc (deixa os tempos mais lentos)")
+    parser.add_argument("--out", default=None, help="arquivo JSON de saída (padrão: results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=1.25, help="razão novo/antigo considerada regressão")
+    args = parser.parse_args()
+
+    env = environment()
+    report = {'ambiente': env, 'parametros': {'seed': args.seed, 'repeat': args.repeat, 'alloc': args.alloc},
+              'tamanhos': {}}
+    ctx = get_context("spawn")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                result = pool.submit(run_size, rows, args.seed, args.repeat, args.alloc).result()
+            except (BrokenProcessPool, MemoryError) as e:
+                # Tipicamente o processo filho morto por falta de memória
+                result = {'linhas': rows, 'erro': f"{type(e).__name__}: {e}"}
+        report['tamanhos'][str(rows)] = result
+        if 'erro' in result:
+            print(f"{rows:>10} linhas: falhou ({result['erro']})")
+            continue
+        print(f"{rows:>10} linhas · CSV {result['csv_mb']} MB · pico RSS {result['rss_pico_mb']} MB")
+        for stage, entry in result['etapas'].items():
+            extra = f" · alocado {entry['alocado_pico_mb']} MB" if 'alocado_pico_mb' in entry else ""
+            print(f"{'':>12}{stage:<34} {entry['segundos']:>9.4f}s · RSS {entry['rss_delta_mb']:+.1f} MB{extra}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{env['commit'] or 'sem_commit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"resultados em {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        print(f"{regressions} etapa(s) com regressão")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
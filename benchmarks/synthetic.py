@@ -0,0 +1,148 @@
+# ZF Restaurantes – Gerador de datasets sintéticos
+# -------------------------------------------------------------
+# Gera frames com o mesmo esquema de dataset/new_zomato.csv em qualquer
+# tamanho (10k a 10M linhas), sem rede. O vocabulário (países, moedas,
+# cidades e suas coordenadas, culinárias) vem do CSV real; as
+# distribuições é que são sintéticas:
+#   - países e cidades com popularidade Zipf (poucos concentram a maioria
+#     das linhas, como no Zomato original, onde a Índia domina);
+#   - 1 a 8 culinárias por restaurante (média ~2,3, como na base completa
+#     do Zomato), sorteadas por popularidade Zipf e sem repetição na linha;
+#   - preço, nota e votos dependentes da faixa de preço.
+#
+# Uso (como módulo):
+#   from synthetic import zomato_frame
+#   raw = zomato_frame(1_000_000, seed=0)
+# -------------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "new_zomato.csv")
+
+# Probabilidade de 1..8 culinárias por restaurante
+CUISINES_PER_ROW = np.array([0.33, 0.30, 0.19, 0.10, 0.05, 0.02, 0.007, 0.003])
+
+COUNTRY_SKEW = 1.6
+CITY_SKEW = 1.1
+CUISINE_SKEW = 1.0
+
+# (nota mínima, rating_text, rating_color, color_name)
+RATINGS = [(0.0, "Not rated", "CBCBC8", "grey"), (0.1, "Poor", "CD1F1F", "red"),
+           (2.5, "Average", "FF7800", "orange"), (3.5, "Good", "9ACD32", "lightgreen"),
+           (4.0, "Very Good", "5BA829", "green"), (4.5, "Excellent", "3F7E00", "darkgreen")]
+
+
+def _zipf(n: int, skew: float) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1) ** skew
+    return w / w.sum()
+
+
+class Vocabulary:
+    """Valores reais do CSV, ordenados por frequência (o 1º vira o mais popular)."""
+
+    def __init__(self, base: pd.DataFrame):
+        countries = base['country'].value_counts().index
+        self.countries = countries.to_numpy(dtype=object)
+        first = base.groupby('country').first()
+        self.country_code = first.loc[countries, 'country_code'].to_numpy()
+        self.currency = first.loc[countries, 'currency'].to_numpy(dtype=object)
+        # Custo em moeda local por dólar, para manter avg_cost_dollar_for_two coerente
+        rate = (base['average_cost_for_two'] / base['avg_cost_dollar_for_two']).groupby(base['country']).median()
+        self.local_per_dollar = rate.loc[countries].to_numpy(dtype=float)
+
+        cities = base.groupby(['country', 'city'])
+        coords = cities[['latitude', 'longitude']].median()
+        counts = cities.size()
+        self.cities = []
+        for country in countries:
+            c = counts.loc[country].sort_values(ascending=False)
+            self.cities.append((c.index.to_numpy(dtype=object), coords.loc[country].loc[c.index].to_numpy()))
+
+        cuisines = base['cuisines'].dropna().str.split(',').explode().str.strip()
+        self.cuisines = cuisines[cuisines != ''].value_counts().index.to_numpy(dtype=object)
+
+
+def _cuisine_codes(rng, rows: int, n_vocab: int) -> list:
+    """Colunas de códigos (uma por posição na lista); -1 onde a linha tem menos culinárias."""
+    k = rng.choice(len(CUISINES_PER_ROW), size=rows, p=CUISINES_PER_ROW) + 1
+    p = _zipf(n_vocab, CUISINE_SKEW)
+    columns = []
+    for j in range(k.max()):
+        active = k > j
+        codes = rng.choice(n_vocab, size=rows, p=p)
+        # Sem repetição na linha: desloca até não colidir com as anteriores
+        for _ in range(len(CUISINES_PER_ROW)):
+            clash = np.zeros(rows, dtype=bool)
+            for prev in columns:
+                clash |= prev == codes
+            if not clash.any():
+                break
+            codes[clash] = (codes[clash] + 1) % n_vocab
+        columns.append(np.where(active, codes, -1))
+    return columns
+
+
+def zomato_frame(rows: int, seed: int = 0, base: pd.DataFrame = None) -> pd.DataFrame:
+    """Frame bruto com as colunas (e a ordem) de new_zomato.csv."""
+    base = pd.read_csv(DEFAULT_CSV) if base is None else base
+    vocab = Vocabulary(base)
+    rng = np.random.default_rng(seed)
+
+    country = rng.choice(len(vocab.countries), size=rows, p=_zipf(len(vocab.countries), COUNTRY_SKEW))
+    city = np.empty(rows, dtype=object)
+    lat = np.empty(rows)
+    lon = np.empty(rows)
+    for c, (names, coords) in enumerate(vocab.cities):
+        at = np.flatnonzero(country == c)
+        pick = rng.choice(len(names), size=len(at), p=_zipf(len(names), CITY_SKEW))
+        city[at] = names[pick]
+        # ~3 km de espalhamento em torno do centro da cidade
+        lat[at] = coords[pick, 0] + rng.normal(0, 0.03, len(at))
+        lon[at] = coords[pick, 1] + rng.normal(0, 0.03, len(at))
+
+    names = vocab.cuisines
+    first, *rest = _cuisine_codes(rng, rows, len(names))
+    cuisines = pd.Series(names[first], dtype=object)
+    for codes in rest:
+        cuisines = cuisines + np.where(codes >= 0, ", ", "") + np.where(codes >= 0, names[np.maximum(codes, 0)], "")
+
+    price_range = rng.choice(4, size=rows, p=[0.45, 0.32, 0.15, 0.08]) + 1
+    dollars = np.round(rng.lognormal(np.log(10.0 * price_range), 0.35), 3)
+    cost = np.round(dollars * vocab.local_per_dollar[country], -1).astype(np.int64)
+    rated = rng.random(rows) > 0.2
+    rating = np.where(rated, np.round(np.clip(rng.normal(3.1 + 0.2 * price_range, 0.45), 1.8, 4.9), 1), 0.0)
+    votes = np.where(rated, rng.lognormal(4.0 + 0.4 * price_range, 1.2), rng.integers(0, 4, rows)).astype(np.int64)
+    band = np.searchsorted([r[0] for r in RATINGS], rating, side='right') - 1
+    online = (rng.random(rows) < 0.35).astype(np.int64)
+
+    ids = np.arange(1, rows + 1, dtype=np.int64)
+    label = pd.Series(ids).astype(str)
+    return pd.DataFrame({
+        'restaurant_id': 18_000_000 + ids,
+        'restaurant_name': ("Restaurante " + label).to_numpy(dtype=object),
+        'country_code': vocab.country_code[country],
+        'city': city,
+        'address': ("Rua " + label + ", " + city).to_numpy(dtype=object),
+        'locality': city,
+        'locality_verbose': city,
+        'longitude': np.clip(lon, -180, 180),
+        'latitude': np.clip(lat, -90, 90),
+        'cuisines': cuisines.to_numpy(dtype=object),
+        'average_cost_for_two': cost,
+        'currency': vocab.currency[country],
+        'has_table_booking': (rng.random(rows) < 0.03 * price_range).astype(np.int64),
+        'has_online_delivery': online,
+        'is_delivering_now': online * (rng.random(rows) < 0.4),
+        'switch_to_order_menu': np.zeros(rows, dtype=np.int64),
+        'price_range': price_range,
+        'aggregate_rating': rating,
+        'rating_color': np.array([r[2] for r in RATINGS], dtype=object)[band],
+        'rating_text': np.array([r[1] for r in RATINGS], dtype=object)[band],
+        'votes': votes,
+        'country': vocab.countries[country],
+        'color_name': np.array([r[3] for r in RATINGS], dtype=object)[band],
+        'avg_cost_dollar_for_two': dollars,
+    })
@@ -0,0 +1,78 @@
+# ZF Restaurantes – Linha de comando
+# -------------------------------------------------------------
+# Uso:
+#   python cli.py build-cache dataset/new_zomato.csv [--cache-dir DIR] [--force]
+#   python cli.py report dataset/*.csv --out relatorios [--format json|parquet]
+#                 [--country PAÍS ...] [--city CIDADE ...] [--cuisine CULINÁRIA ...] [--currency BRL]
+# -------------------------------------------------------------
+
+import argparse
+import os
+import sys
+
+import disk_cache
+import report
+from analytics import default_workers
+from pricing import DEFAULT_TARGET, TARGETS
+
+
+def cmd_build_cache(args) -> int:
+    for csv_path in args.csv:
+        path = disk_cache.build_cache(csv_path, cache_dir=args.cache_dir, force=args.force)
+        print(f"{csv_path} -> {path} ({os.path.getsize(path) / 2**20:.1f} MB)")
+    return 0
+
+
+def cmd_report(args) -> int:
+    failed = 0
+    for csv_path in args.csv:
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        try:
+            result = report.load_report(
+                csv_path, cache_dir=args.cache_dir, countries=args.country, cities=args.city,
+                cuisines=args.cuisine, workers=args.workers, currency=args.currency,
+            )
+        except (OSError, ValueError) as e:
+            # ValueError cobre MissingColumnsError e os erros de leitura do pandas
+            # (EmptyDataError, ParserError): o arquivo conta como falha e o lote segue
+            print(f"{csv_path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        if args.format == "parquet":
+            written = report.write_parquet(result, os.path.join(args.out, stem))
+            target = f"{os.path.join(args.out, stem)} ({len(written)} arquivos)"
+        else:
+            target = report.write_json(result, os.path.join(args.out, f"{stem}.json"))
+        print(f"{csv_path} -> {target} ({result['linhas_filtradas']} linhas, {result['segundos']['total']:.2f}s)")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="cli.py", description="ZF Restaurantes – ferramentas offline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build-cache", help="pré-constrói o cache colunar do(s) CSV(s)")
+    p.add_argument("csv", nargs="+", help="caminho(s) do CSV")
+    p.add_argument("--cache-dir", default=None,
+                   help=f"diretório do cache (padrão: ${disk_cache.CACHE_DIR_ENV} ou .fz_cache ao lado do CSV)")
+    p.add_argument("--force", action="store_true", help="reconstrói mesmo se o cache existir")
+    p.set_defaults(func=cmd_build_cache)
+
+    p = sub.add_parser("report", help="calcula as respostas de todas as abas e grava em JSON/Parquet")
+    p.add_argument("csv", nargs="+", help="caminho(s) do CSV")
+    p.add_argument("--out", required=True, help="diretório de saída (um relatório por CSV)")
+    p.add_argument("--format", choices=["json", "parquet"], default="json")
+    p.add_argument("--country", action="append", default=None, help="filtra por país (repetível)")
+    p.add_argument("--city", action="append", default=None, help="filtra por cidade (repetível)")
+    p.add_argument("--cuisine", action="append", default=None, help="filtra por culinária (repetível)")
+    p.add_argument("--currency", choices=list(TARGETS), default=DEFAULT_TARGET, help="moeda dos preços")
+    p.add_argument("--workers", type=int, default=default_workers(), help="threads para os cálculos das abas")
+    p.add_argument("--cache-dir", default=None, help="diretório do cache colunar (como em build-cache)")
+    p.set_defaults(func=cmd_report)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# ZF Restaurantes – Índice invertido de culinárias
+# -------------------------------------------------------------
+# Construído uma vez no carregamento: para cada culinária, as posições
+# (ordenadas) das linhas que a listam, em formato CSR (offsets + rows).
+# Filtros por culinária viram operações sobre esses arrays, sem .apply
+# por linha nem regex sobre a coluna inteira.
+#
+# Guarda também a tabela ponte restaurante x culinária na ordem das linhas
+# (posição + id da culinária, CSR por linha): o recorte do filtro vira um
+# gather de faixas, no lugar do .explode('cuisines_list') em cada aba.
+# -------------------------------------------------------------
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_prep import _clean_cuisines
+from sorted_arrays import ranges
+
+
+class CuisineIndex:
+    """Índice culinária -> posições de linha do DataFrame preparado.
+
+    As posições são relativas à ordem das linhas do DataFrame usado no build
+    (que tem RangeIndex, então posição == rótulo do índice).
+    """
+
+    def __init__(self, names: np.ndarray, offsets: np.ndarray, rows: np.ndarray, n_rows: int,
+                 row_offsets: np.ndarray, pair_cuisines: np.ndarray):
+        self.names = names
+        self.offsets = offsets
+        self.rows_flat = rows
+        self.n_rows = n_rows
+        # Ponte por linha: culinárias da linha i em pair_cuisines[row_offsets[i]:row_offsets[i + 1]]
+        self.row_offsets = row_offsets
+        self.pair_cuisines = pair_cuisines
+        self._lower = np.array([n.lower() for n in names], dtype=object)
+        self._id_of = {n: i for i, n in enumerate(names)}
+        self._word_ids = {}
+
+    @classmethod
+    def build(cls, cuisines: pd.Series) -> "CuisineIndex":
+        """Monta o índice a partir da coluna bruta `cuisines` (mesma regra de `_clean_cuisines`)."""
+        n = len(cuisines)
+        row_codes, combos = pd.factorize(cuisines)
+
+        # Cada combinação distinta de texto -> ids de culinária (sem repetição)
+        combo_lists = [_clean_cuisines(c) for c in combos]
+        names = np.array(sorted({c for lst in combo_lists for c in lst}), dtype=object)
+        id_of = {c: i for i, c in enumerate(names)}
+        combo_ids = [sorted({id_of[c] for c in lst}) for lst in combo_lists]
+        combo_len = np.array([len(ids) for ids in combo_ids] + [0], dtype=np.int64)
+        combo_start = np.concatenate([[0], np.cumsum(combo_len[:-1])])
+        combo_flat = np.fromiter((i for ids in combo_ids for i in ids), dtype=np.int64,
+                                 count=int(combo_len.sum()))
+
+        # Expande para pares (linha, culinária); código -1 (NaN) usa a entrada vazia
+        lens = combo_len[row_codes]
+        pos = np.repeat(np.arange(n, dtype=np.int64), lens)
+        first = np.repeat(np.cumsum(lens) - lens, lens)
+        within = np.arange(len(pos), dtype=np.int64) - first
+        cuisine = combo_flat[np.repeat(combo_start[row_codes], lens) + within]
+
+        # Agrupa por culinária mantendo as posições em ordem crescente
+        order = np.argsort(cuisine, kind='stable')
+        rows = pos[order].astype(np.int32 if n < 2**31 else np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(cuisine, minlength=len(names)))])
+        row_offsets = np.concatenate([[0], np.cumsum(lens)])
+        return cls(names, offsets, rows, n, row_offsets, cuisine.astype(np.int32))
+
+    def postings(self, cid: int) -> np.ndarray:
+        """Posições (ordenadas) das linhas que listam a culinária `cid`."""
+        return self.rows_flat[self.offsets[cid]:self.offsets[cid + 1]]
+
+    def ids(self, names) -> list:
+        """Ids das culinárias com nome exato (ignora nomes desconhecidos)."""
+        return [self._id_of[n] for n in names if n in self._id_of]
+
+    def ids_lower(self, name: str) -> list:
+        """Ids das culinárias cujo nome, em minúsculas, é igual a `name`."""
+        return np.flatnonzero(self._lower == name.strip().lower()).tolist()
+
+    def ids_word(self, term: str) -> list:
+        """Ids das culinárias que contêm `term` como palavra inteira (sem diferenciar maiúsculas)."""
+        key = term.strip().lower()
+        if key not in self._word_ids:
+            pattern = re.compile(fr"\b{key}\b")
+            self._word_ids[key] = [i for i, n in enumerate(self._lower) if pattern.search(n)]
+        return self._word_ids[key]
+
+    def rows(self, ids) -> np.ndarray:
+        """União (ordenada, sem repetição) das posições das culinárias `ids`."""
+        if len(ids) == 0:
+            return np.empty(0, dtype=self.rows_flat.dtype)
+        if len(ids) == 1:
+            return self.postings(ids[0])
+        return np.unique(np.concatenate([self.postings(i) for i in ids]))
+
+    def bridge(self, rows=None):
+        """Pares (linha, id de culinária) das linhas `rows` (None = todas), na ordem de `rows`.
+
+        A linha de cada par é a posição dentro de `rows`, ou seja, indexa
+        direto as colunas de `project(df, rows, ...)`.
+        """
+        if rows is None:
+            counts = np.diff(self.row_offsets)
+            return np.repeat(np.arange(self.n_rows, dtype=np.int64), counts), self.pair_cuisines
+        rows = np.asarray(rows)
+        starts, ends = self.row_offsets[rows], self.row_offsets[rows + 1]
+        local = np.repeat(np.arange(len(rows), dtype=np.int64), ends - starts)
+        return local, self.pair_cuisines[ranges(starts, ends)]
+
+    def distinct(self, rows=None) -> int:
+        """Número de culinárias distintas nas linhas `rows` (None = todas)."""
+        if rows is None:
+            return int((np.diff(self.offsets) > 0).sum())
+        return int(np.count_nonzero(np.bincount(self.bridge(rows)[1], minlength=len(self.names))))
@@ -0,0 +1,174 @@
+# ZF Restaurantes – Preparação de dados
+# -------------------------------------------------------------
+# Normalização do CSV bruto (nomes de colunas, tipos, flags e culinárias).
+# Não depende do Streamlit: é usado pelo app.py e pelos scripts de benchmark.
+# -------------------------------------------------------------
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from pricing import PRICE_COLUMN, usd_cost
+
+# Versão da saída de prepare_dataframe gravada no cache; incremente ao mudar
+# colunas persistidas ou tipos (DERIVED_COLUMNS são refeitas ao carregar e não contam)
+SCHEMA_VERSION = 2
+
+# Variações comuns de nomes de colunas -> nome interno
+RENAME_MAP = {
+    'Restaurant ID': 'restaurant_id',
+    'Restaurant Name': 'restaurant_name',
+    'Country Code': 'country',
+    'City': 'city',
+    'Cuisines': 'cuisines',
+    'Average Cost for two': 'average_cost_for_two',
+    'Currency': 'currency',
+    'Aggregate rating': 'aggregate_rating',
+    'Rating text': 'rating_text',
+    'Votes': 'votes',
+    'Price range': 'price_range',
+    'Has Online delivery': 'has_online_delivery',
+    'Is delivering now': 'is_delivering_now',
+    'Has Table booking': 'has_table_booking',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+}
+
+# Colunas mínimas exigidas após o rename
+REQUIRED_COLUMNS = {
+    "restaurant_id","restaurant_name","country","city","cuisines",
+    "average_cost_for_two","currency","aggregate_rating","votes","price_range",
+    "has_online_delivery","is_delivering_now","has_table_booking"
+}
+
+# Coordenadas (opcionais: quando o CSV não as tem, ficam NaN)
+COORD_COLUMNS = ['latitude','longitude']
+
+FLAG_COLUMNS = ['has_online_delivery','is_delivering_now','has_table_booking']
+
+# Colunas derivadas (recalculadas no carregamento, não persistidas)
+DERIVED_COLUMNS = ['cuisines_list',PRICE_COLUMN]
+
+# Colunas de texto de baixa cardinalidade guardadas como category (com strip)
+CATEGORY_COLUMNS = ['country','city','currency']
+
+
+class MissingColumnsError(ValueError):
+    """O CSV não tem todas as colunas mínimas (após o rename)."""
+
+
+def _coerce_bool(x):
+    """Normaliza valores booleanos/flags que podem vir como 0/1, True/False, Yes/No, 'Y'/'N', etc."""
+    if pd.isna(x):
+        return False
+    if isinstance(x, (int, float)):
+        return bool(int(x))
+    s = str(x).strip().lower()
+    return s in {"1", "true", "yes", "y", "sim"}
+
+
+def _clean_cuisines(s):
+    if pd.isna(s):
+        return []
+    # Divide por vírgula e limpa espaços
+    return [c.strip() for c in str(s).split(',') if c.strip()]
+
+
+def _map_uniques(s: pd.Series, func, na_value, dtype) -> np.ndarray:
+    """Aplica `func` só aos valores distintos de `s` e espalha o resultado pelas linhas.
+
+    Equivale a `s.apply(func)`, mas o Python roda uma vez por valor distinto
+    (tabela de lookup indexada pelos códigos do factorize).
+    """
+    codes, uniques = pd.factorize(s)
+    # astype(object) devolve escalares Python (int/float/str), como o .apply recebe
+    values = np.asarray(uniques, dtype=object)
+    lut = np.empty(len(values) + 1, dtype=dtype)
+    for i, v in enumerate(values):
+        lut[i] = func(v)
+    # Código -1 (NaN) cai na última posição
+    lut[-1] = na_value
+    return lut[codes]
+
+
+def coerce_bool_series(s: pd.Series) -> pd.Series:
+    """Versão vetorizada de `s.apply(_coerce_bool)`."""
+    return pd.Series(_map_uniques(s, _coerce_bool, False, bool), index=s.index, name=s.name)
+
+
+def clean_cuisines_series(s: pd.Series) -> pd.Series:
+    """Versão vetorizada de `s.apply(_clean_cuisines)`.
+
+    Linhas com o mesmo texto de culinárias compartilham o mesmo objeto lista;
+    trate as listas como somente leitura.
+    """
+    return pd.Series(_map_uniques(s, _clean_cuisines, [], object), index=s.index, name=s.name)
+
+
+def clean_str_category(s: pd.Series) -> pd.Series:
+    """Equivale a `s.astype(str).str.strip()`, devolvido como category.
+
+    O strip roda sobre os valores distintos. Valores ausentes viram texto
+    ('nan', 'None'), como no astype(str), e são convertidos linha a linha.
+    """
+    codes, uniques = pd.factorize(s)
+    labels = pd.Index(uniques).astype(str).str.strip()
+    na = codes == -1
+    na_labels = s[na].astype(str).str.strip()
+    dtype = pd.CategoricalDtype(sorted(set(labels) | set(na_labels)))
+    out = np.empty(len(s), dtype=np.int32)
+    out[~na] = pd.Categorical(labels, dtype=dtype).codes[codes[~na]]
+    out[na] = pd.Categorical(na_labels, dtype=dtype).codes
+    return pd.Series(pd.Categorical.from_codes(out, dtype=dtype), index=s.index, name=s.name)
+
+
+def clean_str_series(s: pd.Series) -> pd.Series:
+    """Equivale a `s.astype(str).str.strip()`, mantendo dtype object."""
+    return clean_str_category(s).astype(object)
+
+
+def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    # Renomeia colunas essenciais se houver variações comuns
+    df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns})
+
+    # Garante colunas mínimas
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise MissingColumnsError(f"Faltam colunas no CSV: {missing}")
+
+    # Tipagens básicas
+    df['restaurant_id'] = pd.to_numeric(df['restaurant_id'], errors='coerce')
+    df['average_cost_for_two'] = pd.to_numeric(df['average_cost_for_two'], errors='coerce')
+    df['aggregate_rating'] = pd.to_numeric(df['aggregate_rating'], errors='coerce')
+    df['votes'] = pd.to_numeric(df['votes'], errors='coerce')
+    df['price_range'] = pd.to_numeric(df['price_range'], errors='coerce')
+    for col in COORD_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64') if col in df.columns else np.nan
+
+    # Normaliza flags
+    for col in FLAG_COLUMNS:
+        df[col] = coerce_bool_series(df[col])
+
+    # Limpa strings
+    df['restaurant_name'] = clean_str_series(df['restaurant_name'])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = clean_str_category(df[col])
+    if 'rating_text' in df.columns:
+        df['rating_text'] = df['rating_text'].astype('category')
+
+    return add_derived_columns(df)
+
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Cuisines em lista + preço em dólar (DERIVED_COLUMNS)."""
+    df['cuisines_list'] = clean_cuisines_series(df['cuisines'])
+    df[PRICE_COLUMN] = usd_cost(df['average_cost_for_two'], df['currency'])
+    return df
+
+
+def schema_key() -> str:
+    """Chave do esquema preparado; muda com o rename, as colunas mínimas ou SCHEMA_VERSION."""
+    spec = repr((SCHEMA_VERSION, sorted(RENAME_MAP.items()), sorted(REQUIRED_COLUMNS)))
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
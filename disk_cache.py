@@ -0,0 +1,203 @@
+# ZF Restaurantes – Cache colunar em disco
+# -------------------------------------------------------------
+# Persiste a saída de prepare_dataframe em Arrow IPC (Feather v2, sem
+# compressão) para que a leitura seja memory-mapped e carregue só as
+# colunas usadas pelo dashboard. O arquivo é identificado pelo hash do
+# CSV de origem e pela chave de esquema (data_prep.schema_key), então
+# mudar o CSV ou a preparação invalida o cache automaticamente. A cada
+# gravação, os arquivos do mesmo CSV com outra chave de esquema são
+# apagados e, acima de $FZ_CACHE_MAX_MB, os usados há mais tempo também.
+# -------------------------------------------------------------
+
+import hashlib
+import io
+import os
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+import ingest
+from data_prep import (
+    COORD_COLUMNS,
+    DERIVED_COLUMNS,
+    REQUIRED_COLUMNS,
+    add_derived_columns,
+    prepare_dataframe,
+    schema_key,
+)
+from profiling import Profiler
+
+CACHE_DIR_ENV = "FZ_CACHE_DIR"
+CACHE_SUFFIX = ".arrow"
+CACHE_MAX_MB_ENV = "FZ_CACHE_MAX_MB"
+DEFAULT_CACHE_MAX_MB = 4096
+
+# Colunas lidas pelo dashboard (as demais ficam no arquivo, mas não são carregadas)
+DASHBOARD_COLUMNS = sorted(REQUIRED_COLUMNS) + COORD_COLUMNS
+
+
+class CacheWriteError(OSError):
+    """A ingestão em blocos não conseguiu gravar o spill no diretório de cache."""
+
+
+_DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset", ".fz_cache")
+
+
+def bytes_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 do arquivo, lido em blocos (mesmo valor de `bytes_digest` do conteúdo)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def default_cache_dir(source_path: str = None) -> str:
+    """$FZ_CACHE_DIR, senão `.fz_cache` ao lado do CSV, senão dataset/.fz_cache."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    if source_path:
+        return os.path.join(os.path.dirname(os.path.abspath(source_path)), ".fz_cache")
+    return _DEFAULT_DIR
+
+
+def cache_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"{digest[:32]}-{schema_key()}{CACHE_SUFFIX}")
+
+
+def prune_cache(path: str, max_bytes: int = None) -> list:
+    """Apaga do diretório de `path` (recém-gravado) o que ele torna inútil; devolve os apagados.
+
+    Saem os arquivos do mesmo digest com outra chave de esquema (nunca mais
+    lidos) e, se o diretório passar de `max_bytes` ($FZ_CACHE_MAX_MB), os de
+    uso mais antigo (mtime, renovado a cada leitura). `path` nunca sai.
+    """
+    if max_bytes is None:
+        max_bytes = int(float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_CACHE_MAX_MB)) * 2**20)
+    cache_dir, name = os.path.split(path)
+    prefix = name.split("-", 1)[0]
+    entries = []
+    for other in os.listdir(cache_dir):
+        full = os.path.join(cache_dir, other)
+        if other == name or not other.endswith(CACHE_SUFFIX):
+            continue
+        try:
+            info = os.stat(full)
+        except OSError:
+            continue
+        entries.append((other.startswith(f"{prefix}-"), info.st_mtime, info.st_size, full))
+
+    try:
+        total = os.path.getsize(path) + sum(e[2] for e in entries)
+    except OSError:
+        return []
+    removed = []
+    # Esquema antigo primeiro, depois do uso mais antigo para o mais recente
+    for stale, _, size, full in sorted(entries, key=lambda e: (not e[0], e[1])):
+        if not stale and total <= max_bytes:
+            break
+        try:
+            os.remove(full)
+        except OSError:
+            continue
+        total -= size
+        removed.append(full)
+    return removed
+
+
+def write_cache(df: pd.DataFrame, path: str) -> None:
+    """Grava o frame preparado (sem as colunas derivadas) de forma atômica."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    feather.write_feather(df.drop(columns=DERIVED_COLUMNS), tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    prune_cache(path)
+
+
+def read_cache(path: str, columns=DASHBOARD_COLUMNS) -> pd.DataFrame:
+    """Lê o cache memory-mapped, só com `columns` (None = todas), e refaz as colunas derivadas.
+
+    O mmap evita ler o arquivo para a memória, mas o DataFrame devolvido é
+    materializado (to_pandas): a memória é proporcional às linhas x `columns`.
+    """
+    if columns is not None and 'cuisines' not in columns:
+        columns = list(columns) + ['cuisines']
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    df = table.to_pandas()
+    if (table.schema.metadata or {}).get(ingest.STREAM_METADATA_KEY):
+        df = ingest.restore_dtypes(df)
+    return add_derived_columns(df)
+
+
+def _select(df: pd.DataFrame, columns) -> pd.DataFrame:
+    if columns is None:
+        return df
+    keep = [c for c in df.columns if c in set(columns) | {'cuisines'} | set(DERIVED_COLUMNS)]
+    return df[keep]
+
+
+def load_prepared(source, digest: str, cache_dir: str = None, columns=DASHBOARD_COLUMNS,
+                  chunk_rows: int = None, profiler: Profiler = None):
+    """Frame preparado de `source` (bytes ou caminho do CSV), via cache em disco.
+
+    Devolve (df, hit). Em caso de miss lê e prepara o CSV e grava o cache;
+    se a gravação falhar (disco somente leitura, tipo sem equivalente no
+    Arrow), segue sem cache. Com `chunk_rows`, o miss usa a ingestão em
+    blocos (ingest.stream_to_arrow), que grava só DASHBOARD_COLUMNS e
+    precisa do cache: falha de gravação vira CacheWriteError. Os blocos
+    limitam a memória só da leitura do CSV e do preparo; o frame devolvido
+    (read_cache) continua proporcional ao número de linhas.
+    `profiler` (profiling.Profiler) mede leitura, preparo e gravação.
+    """
+    profiler = profiler or Profiler()
+    if cache_dir is None:
+        cache_dir = default_cache_dir(source if isinstance(source, str) else None)
+    path = cache_path(cache_dir, digest)
+    if os.path.exists(path):
+        try:
+            # Marca o uso (prune_cache apaga primeiro os usados há mais tempo)
+            os.utime(path)
+        except OSError:
+            pass
+        with profiler.stage("leitura_cache"):
+            return read_cache(path, columns), True
+
+    if chunk_rows:
+        stream_source = io.BytesIO(source) if isinstance(source, bytes) else source
+        try:
+            with profiler.stage("ingestao_em_blocos"):
+                ingest.stream_to_arrow(stream_source, path, DASHBOARD_COLUMNS, chunk_rows)
+        except OSError as e:
+            raise CacheWriteError(
+                f"Não foi possível gravar o cache em {cache_dir} ({e.strerror or e}). A ingestão em blocos "
+                f"precisa de um diretório de cache gravável (defina {CACHE_DIR_ENV} ou use 0 linhas por bloco)."
+            ) from e
+        prune_cache(path)
+        with profiler.stage("leitura_cache"):
+            return read_cache(path, columns), False
+
+    with profiler.stage("leitura_csv"):
+        raw = pd.read_csv(io.BytesIO(source) if isinstance(source, bytes) else source)
+    with profiler.stage("prepare_dataframe"):
+        df = prepare_dataframe(raw)
+    try:
+        with profiler.stage("gravacao_cache"):
+            write_cache(df, path)
+    except (OSError, pa.ArrowException):
+        pass
+    return _select(df, columns), False
+
+
+def build_cache(csv_path: str, cache_dir: str = None, force: bool = False) -> str:
+    """Pré-constrói o cache de `csv_path` (uso offline, antes do deploy). Devolve o caminho."""
+    if cache_dir is None:
+        cache_dir = default_cache_dir(csv_path)
+    path = cache_path(cache_dir, file_digest(csv_path))
+    if force or not os.path.exists(path):
+        write_cache(prepare_dataframe(pd.read_csv(csv_path)), path)
+    return path
@@ -0,0 +1,237 @@
+# ZF Restaurantes – Índice espacial e clusters do mapa
+# -------------------------------------------------------------
+# Grade regular em graus: cada restaurante cai numa célula e as posições
+# ficam ordenadas por célula (CSR), com as células de uma mesma faixa de
+# latitude em chaves contíguas. A busca "num raio de N km" e o recorte da
+# janela visível só olham as células candidatas e calculam haversine
+# nelas. Para o mapa, os pontos são agrupados por célula a cada nível de
+# zoom, e só os clusters (contagem, centróide, nota média) vão para o
+# navegador.
+# -------------------------------------------------------------
+
+import math
+
+import numpy as np
+import pandas as pd
+from haversine import Unit, haversine_vector
+
+from sorted_arrays import isin_sorted, ranges
+
+# Lado da célula do índice de busca, em graus (~11 km no equador)
+DEFAULT_CELL_DEG = 0.1
+
+# Cada cluster ocupa ~64 px de um tile de 256 px: 4 células por tile e por eixo
+CELLS_PER_TILE = 4
+
+# Clusters pré-calculados até este zoom; acima dele, só para a janela visível
+PRECLUSTER_MAX_ZOOM = 10
+
+KM_PER_DEG = 111.195
+
+CLUSTER_COLUMNS = ['latitude','longitude','restaurantes','nota_media','linha']
+
+
+def valid_coords(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Máscara das coordenadas utilizáveis (finitas, dentro do globo, diferentes de 0,0)."""
+    with np.errstate(invalid="ignore"):
+        ok = (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    return ok & ~((lat == 0) & (lon == 0))
+
+
+def _lon_intervals(west: float, east: float):
+    """Intervalos [a, b] de longitude em [-180, 180] cobertos por west..east (com volta no antimeridiano)."""
+    width = east - west if east >= west else east - west + 360
+    if width >= 360:
+        return [(-180.0, 180.0)]
+    west = (west + 180) % 360 - 180
+    east = west + width
+    if east <= 180:
+        return [(west, east)]
+    return [(west, 180.0), (-180.0, east - 360)]
+
+
+class GridIndex:
+    """Posições de linha por célula da grade (chave = linha_lat * n_cols + coluna_lon)."""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_deg: float, order: np.ndarray,
+                 keys: np.ndarray, starts: np.ndarray):
+        self.lat = lat
+        self.lon = lon
+        self.cell_deg = cell_deg
+        self.n_cols = int(math.ceil(360 / cell_deg))
+        self.n_rows = int(math.ceil(180 / cell_deg))
+        self.order = order
+        self.keys = keys
+        self.starts = starts
+
+    @classmethod
+    def build(cls, lat, lon, cell_deg: float = DEFAULT_CELL_DEG) -> "GridIndex":
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        positions = np.flatnonzero(valid_coords(lat, lon))
+        n_cols = int(math.ceil(360 / cell_deg))
+        n_rows = int(math.ceil(180 / cell_deg))
+        iy = np.minimum(((lat[positions] + 90) // cell_deg).astype(np.int64), n_rows - 1)
+        ix = np.minimum(((lon[positions] + 180) // cell_deg).astype(np.int64), n_cols - 1)
+        cell = iy * n_cols + ix
+        # Estável: dentro de uma célula as posições ficam em ordem crescente
+        sort = np.argsort(cell, kind="stable")
+        cell = cell[sort]
+        first = np.r_[0, np.flatnonzero(cell[1:] != cell[:-1]) + 1] if len(cell) else np.empty(0, dtype=np.int64)
+        return cls(lat, lon, cell_deg, positions[sort], cell[first], np.r_[first, len(cell)].astype(np.int64))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _row(self, lat: float) -> int:
+        return min(max(int((lat + 90) // self.cell_deg), 0), self.n_rows - 1)
+
+    def _col(self, lon: float) -> int:
+        return min(max(int((lon + 180) // self.cell_deg), 0), self.n_cols - 1)
+
+    def candidates(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Posições das células que tocam a caixa (superconjunto do resultado exato)."""
+        rows = np.arange(self._row(south), self._row(north) + 1, dtype=np.int64)
+        lo, hi = [], []
+        for a, b in _lon_intervals(west, east):
+            # Numa faixa de latitude, colunas consecutivas são chaves consecutivas
+            lo.append(rows * self.n_cols + self._col(a))
+            hi.append(rows * self.n_cols + self._col(b) + 1)
+        first = np.searchsorted(self.keys, np.concatenate(lo))
+        last = np.searchsorted(self.keys, np.concatenate(hi))
+        return self.order[ranges(self.starts[first], self.starts[last])]
+
+    def in_bounds(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Posições (crescentes) dentro da janela south..north x west..east."""
+        cand = self.candidates(south, west, north, east)
+        lat, lon = self.lat[cand], self.lon[cand]
+        keep = (lat >= south) & (lat <= north)
+        width = east - west
+        if width < 360:
+            keep &= (lon - west) % 360 <= width
+        return np.sort(cand[keep])
+
+    def within(self, lat: float, lon: float, km: float, rows=None):
+        """Posições a até `km` de (lat, lon) e as distâncias, da mais próxima para a mais distante.
+
+        `rows` (posições crescentes, None = todas) restringe a busca ao recorte do filtro.
+        """
+        dlat = km / KM_PER_DEG
+        south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        widest = max(abs(south), abs(north))
+        if widest >= 90 or km / (KM_PER_DEG * math.cos(math.radians(widest))) >= 180:
+            west, east = -180.0, 180.0
+        else:
+            dlon = km / (KM_PER_DEG * math.cos(math.radians(widest)))
+            west, east = lon - dlon, lon + dlon
+        cand = self.candidates(south, west, north, east)
+        if rows is not None:
+            cand = cand[isin_sorted(cand, rows)]
+        if len(cand) == 0:
+            return cand, np.empty(0, dtype=np.float64)
+        # Haversine só nas células candidatas
+        points = np.column_stack([self.lat[cand], self.lon[cand]])
+        dist = haversine_vector([(lat, lon)], points, Unit.KILOMETERS, comb=True).ravel()
+        keep = dist <= km
+        cand, dist = cand[keep], dist[keep]
+        by_dist = np.argsort(dist, kind="stable")
+        return cand[by_dist], dist[by_dist]
+
+
+def cell_deg_for_zoom(zoom: int) -> float:
+    return 360 / (256 * 2**zoom) * (256 / CELLS_PER_TILE)
+
+
+def _group(keys: np.ndarray, count, lat_sum, lon_sum, rating_sum, rating_n, linha) -> dict:
+    """Soma as parcelas por chave (ordena uma vez e usa reduceat)."""
+    sort = np.argsort(keys, kind="stable")
+    keys = keys[sort]
+    first = np.r_[0, np.flatnonzero(keys[1:] != keys[:-1]) + 1]
+    return {
+        'key': keys[first],
+        'count': np.add.reduceat(count[sort], first),
+        'lat_sum': np.add.reduceat(lat_sum[sort], first),
+        'lon_sum': np.add.reduceat(lon_sum[sort], first),
+        'rating_sum': np.add.reduceat(rating_sum[sort], first),
+        'rating_n': np.add.reduceat(rating_n[sort], first),
+        'linha': np.minimum.reduceat(linha[sort], first),
+    }
+
+
+def _cell_keys(lat, lon, zoom: int):
+    cell = cell_deg_for_zoom(zoom)
+    n_cols = CELLS_PER_TILE * 2**zoom
+    iy = np.minimum(((lat + 90) // cell).astype(np.int64), n_cols // 2 - 1)
+    ix = np.minimum(((lon + 180) // cell).astype(np.int64), n_cols - 1)
+    return iy, ix
+
+
+def _frame(parts: dict) -> pd.DataFrame:
+    count = parts['count']
+    with np.errstate(invalid="ignore", divide="ignore"):
+        nota = np.where(parts['rating_n'] > 0, parts['rating_sum'] / parts['rating_n'], np.nan)
+    frame = pd.DataFrame({
+        'latitude': parts['lat_sum'] / count,
+        'longitude': parts['lon_sum'] / count,
+        'restaurantes': count,
+        'nota_media': nota,
+        'linha': parts['linha'],
+    })
+    # Maiores primeiro: o corte por MAX_MARKERS mantém os clusters mais relevantes
+    return frame.sort_values('restaurantes', ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _point_parts(lat, lon, rating, positions) -> dict:
+    rated = ~np.isnan(rating)
+    return {
+        'count': np.ones(len(lat), dtype=np.int64),
+        'lat_sum': lat,
+        'lon_sum': lon,
+        'rating_sum': np.where(rated, rating, 0.0),
+        'rating_n': rated.astype(np.int64),
+        'linha': np.asarray(positions, dtype=np.int64),
+    }
+
+
+def cluster_points(lat, lon, rating, positions, zoom: int) -> pd.DataFrame:
+    """Clusters (CLUSTER_COLUMNS) dos pontos dados num nível de zoom; `linha` = menor posição do grupo."""
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    if len(lat) == 0:
+        return pd.DataFrame({c: [] for c in CLUSTER_COLUMNS})
+    iy, ix = _cell_keys(lat, lon, zoom)
+    parts = _point_parts(lat, lon, np.asarray(rating, dtype=np.float64), positions)
+    return _frame(_group(iy * (CELLS_PER_TILE * 2**zoom) + ix, **parts))
+
+
+def cluster_pyramid(lat, lon, rating, positions, max_zoom: int = PRECLUSTER_MAX_ZOOM) -> dict:
+    """{zoom: clusters} de 0 a `max_zoom`.
+
+    Agrupa os pontos uma única vez no zoom mais fino; cada nível acima
+    soma os clusters do nível de baixo (as células de um zoom são divididas
+    em 2x2 no seguinte), então o custo por nível é proporcional ao número
+    de clusters, não de pontos.
+    """
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    if len(lat) == 0:
+        empty = pd.DataFrame({c: [] for c in CLUSTER_COLUMNS})
+        return {z: empty for z in range(max_zoom + 1)}
+    iy, ix = _cell_keys(lat, lon, max_zoom)
+    parts = _group(iy * (CELLS_PER_TILE * 2**max_zoom) + ix,
+                   **_point_parts(lat, lon, np.asarray(rating, dtype=np.float64), positions))
+    iy, ix = np.divmod(parts.pop('key'), CELLS_PER_TILE * 2**max_zoom)
+    levels = {max_zoom: _frame(parts)}
+    for zoom in range(max_zoom - 1, -1, -1):
+        iy, ix = iy >> 1, ix >> 1
+        parts = _group(iy * (CELLS_PER_TILE * 2**zoom) + ix, **parts)
+        iy, ix = np.divmod(parts.pop('key'), CELLS_PER_TILE * 2**zoom)
+        levels[zoom] = _frame(parts)
+    return levels
+
+
+def clusters_in_bounds(clusters: pd.DataFrame, south: float, west: float, north: float, east: float) -> pd.DataFrame:
+    """Clusters cujo centróide está na janela (com volta no antimeridiano)."""
+    lat, lon = clusters['latitude'].to_numpy(), clusters['longitude'].to_numpy()
+    keep = (lat >= south) & (lat <= north)
+    if east - west < 360:
+        keep &= (lon - west) % 360 <= east - west
+    return clusters.loc[keep]
@@ -0,0 +1,72 @@
+# ZF Restaurantes – Hierarquia país → cidade → faixa de linhas
+# -------------------------------------------------------------
+# Uma permutação das linhas ordenada por (country, city) é calculada uma
+# única vez no carregamento; nela cada par país/cidade ocupa uma faixa
+# contígua. As opções de cidade passam a seguir os países escolhidos e o
+# recorte filtrado vira a concatenação das faixas selecionadas, sem varrer
+# a tabela inteira. O frame em si não é reordenado, então desempates
+# (sort_values, head) continuam iguais aos da ordem original do CSV.
+# -------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from sorted_arrays import ranges
+
+
+def _codes(s: pd.Series) -> np.ndarray:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    return pd.factorize(s, sort=True)[0]
+
+
+class LocationIndex:
+    """Pares (país, cidade) com a faixa de cada um em `order` (posições ordenadas por país/cidade)."""
+
+    def __init__(self, order: np.ndarray, pair_country: np.ndarray, pair_city: np.ndarray,
+                 starts: np.ndarray, ends: np.ndarray, n_rows: int):
+        self.order = order
+        self.pair_country = pair_country
+        self.pair_city = pair_city
+        self.starts = starts
+        self.ends = ends
+        self.n_rows = n_rows
+        self.countries = sorted(set(pair_country.tolist()))
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "LocationIndex":
+        n = len(df)
+        if n == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(empty, np.empty(0, dtype=object), np.empty(0, dtype=object), empty, empty, 0)
+        country, city = _codes(df['country']), _codes(df['city'])
+        # Ordenação estável: dentro de cada cidade as linhas mantêm a ordem original
+        order = np.lexsort((city, country))
+        country, city = country[order], city[order]
+        change = np.flatnonzero((country[1:] != country[:-1]) | (city[1:] != city[:-1])) + 1
+        starts = np.r_[0, change].astype(np.int64)
+        ends = np.r_[change, n].astype(np.int64)
+        first_rows = order[starts]
+        pair_country = np.asarray(df['country'].iloc[first_rows], dtype=object)
+        pair_city = np.asarray(df['city'].iloc[first_rows], dtype=object)
+        # Linhas com país/cidade ausente ficam de fora, como no isin
+        keep = pd.notna(pair_country) & pd.notna(pair_city)
+        order = order.astype(np.int32 if n < 2**31 else np.int64)
+        return cls(order, pair_country[keep], pair_city[keep], starts[keep], ends[keep], n)
+
+    def cities_for(self, countries) -> list:
+        """Cidades (ordenadas, sem repetição) dos países selecionados."""
+        sel = np.isin(self.pair_country, list(countries))
+        return sorted(set(self.pair_city[sel].tolist()))
+
+    def pairs_for(self, countries, cities) -> np.ndarray:
+        """Máscara dos pares cujo país e cidade estão selecionados."""
+        return np.isin(self.pair_country, list(countries)) & np.isin(self.pair_city, list(cities))
+
+    def rows_for(self, countries, cities):
+        """Posições (em ordem crescente) das linhas selecionadas, ou None quando todas passam."""
+        sel = self.pairs_for(countries, cities)
+        if sel.all() and int((self.ends - self.starts).sum()) == self.n_rows:
+            return None
+        # Faixas contíguas na permutação; reordenar só as k selecionadas mantém a ordem do CSV
+        return np.sort(self.order[ranges(self.starts[sel], self.ends[sel])])
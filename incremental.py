@@ -0,0 +1,300 @@
+# ZF Restaurantes – Atualizações incrementais
+# -------------------------------------------------------------
+# O feed muda alguns milhares de linhas por dia. Em vez de reenviar o CSV
+# inteiro, um arquivo delta (colunas do CSV + coluna `op` com insert,
+# update ou delete, chave restaurant_id) é preparado sozinho e aplicado à
+# tabela já preparada: updates ficam na posição da linha original,
+# deletes saem e inserts vão para o fim, a mesma ordem de aplicar o delta
+# ao CSV e preparar tudo de novo. As agregações por país, cidade e
+# culinária são mantidas em contadores (contagens, somas e multiconjuntos
+# para os nunique) e atualizadas só com as linhas removidas/adicionadas.
+# -------------------------------------------------------------
+
+import copy
+import hashlib
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import ingest
+from aggregations import CITY_METRICS, COUNTRY_METRICS, CUISINE_METRICS, _absent_as_na, _where_mask
+from data_prep import RENAME_MAP, prepare_dataframe
+
+OP_COLUMN = 'op'
+OPS = ('insert', 'update', 'delete')
+KEY_COLUMN = 'restaurant_id'
+
+
+class DeltaError(ValueError):
+    """Delta inválido: operação desconhecida, chave vazia/repetida ou incompatível com a tabela."""
+
+
+class Delta(NamedTuple):
+    """Delta lido: linhas novas/alteradas já preparadas e ids removidos."""
+    upserts: pd.DataFrame  # None quando o delta só tem deletes
+    ops: np.ndarray        # 'insert' ou 'update', uma por linha de upserts
+    deletes: np.ndarray    # restaurant_id removidos
+
+
+def chain_digest(digest: str, delta: bytes) -> str:
+    """Identidade da tabela `digest` depois de aplicar `delta` (muda com qualquer byte de ambos)."""
+    return hashlib.sha256(digest.encode("ascii") + hashlib.sha256(delta).digest()).hexdigest()
+
+
+def read_delta(source) -> Delta:
+    """Lê e valida o delta (caminho ou arquivo) e prepara só as linhas de insert/update."""
+    raw = pd.read_csv(source)
+    raw = raw.rename(columns={k: v for k, v in RENAME_MAP.items() if k in raw.columns})
+    missing = [c for c in (OP_COLUMN, KEY_COLUMN) if c not in raw.columns]
+    if missing:
+        raise DeltaError(f"Faltam colunas no delta: {missing}")
+
+    op = raw[OP_COLUMN].astype(str).str.strip().str.lower().to_numpy()
+    unknown = sorted(set(op) - set(OPS))
+    if unknown:
+        raise DeltaError(f"Operações desconhecidas no delta: {unknown} (use {list(OPS)})")
+    ids = pd.to_numeric(raw[KEY_COLUMN], errors='coerce')
+    if ids.isna().any():
+        raise DeltaError("Delta com restaurant_id vazio ou não numérico")
+    repeated = ids[ids.duplicated()].unique()
+    if len(repeated):
+        raise DeltaError(f"restaurant_id repetido no delta: {repeated[:10].tolist()}")
+
+    is_delete = op == 'delete'
+    upserts = None
+    if not is_delete.all():
+        upserts = prepare_dataframe(raw.loc[~is_delete].drop(columns=OP_COLUMN).reset_index(drop=True))
+    return Delta(upserts, op[~is_delete], ids.to_numpy()[is_delete])
+
+
+def _merged_column(base: pd.Series, new: pd.Series, order: np.ndarray) -> pd.Series:
+    """Coluna da nova tabela: `base` seguida de `new`, nas posições `order`.
+
+    Colunas category ficam com a união ordenada das categorias usadas (como
+    no prepare); o resto segue a promoção de tipos do concat.
+    """
+    if isinstance(base.dtype, pd.CategoricalDtype):
+        extra = new.dropna()
+        cats = sorted(set(base.cat.categories) | set(extra.astype(str) if len(extra) else []))
+        codes = np.r_[base.cat.set_categories(cats).cat.codes.to_numpy(),
+                      pd.Categorical(new, categories=cats).codes][order]
+        return pd.Series(pd.Categorical.from_codes(codes, cats), name=base.name).cat.remove_unused_categories()
+    merged = pd.concat([base, new], ignore_index=True)
+    return merged.iloc[order].reset_index(drop=True)
+
+
+def apply_delta(df: pd.DataFrame, delta: Delta):
+    """Aplica `delta` à tabela preparada e devolve (nova tabela, linhas removidas, linhas adicionadas).
+
+    Removidas = deletes + versão antiga dos updates; adicionadas = updates +
+    inserts (é o que as agregações mantidas precisam descontar/somar).
+    """
+    ids = pd.Index(df[KEY_COLUMN])
+    if not ids.is_unique:
+        raise DeltaError("A tabela base tem restaurant_id repetido: não dá para atualizar por chave")
+    n = len(df)
+    take = np.arange(n)
+    keep = np.ones(n, dtype=bool)
+
+    if delta.upserts is None:
+        upserts = df.iloc[:0]
+        updated_pos = inserted = np.empty(0, dtype=np.int64)
+    else:
+        upserts = delta.upserts
+        pos = ids.get_indexer(upserts[KEY_COLUMN].to_numpy())
+        is_update = delta.ops == 'update'
+        if (pos[is_update] < 0).any():
+            absent = upserts[KEY_COLUMN].to_numpy()[is_update & (pos < 0)]
+            raise DeltaError(f"update de restaurant_id inexistente: {absent[:10].tolist()}")
+        if (pos[~is_update] >= 0).any():
+            present = upserts[KEY_COLUMN].to_numpy()[~is_update & (pos >= 0)]
+            raise DeltaError(f"insert de restaurant_id já existente: {present[:10].tolist()}")
+        updated_pos = pos[is_update]
+        # Update: a linha nova ocupa a posição da antiga
+        take[updated_pos] = n + np.flatnonzero(is_update)
+        inserted = n + np.flatnonzero(~is_update)
+
+    deleted_pos = ids.get_indexer(delta.deletes)
+    if (deleted_pos < 0).any():
+        raise DeltaError(f"delete de restaurant_id inexistente: {delta.deletes[deleted_pos < 0][:10].tolist()}")
+    keep[deleted_pos] = False
+
+    upserts = upserts.reindex(columns=df.columns)
+    order = np.r_[take[keep], inserted]
+    new = pd.DataFrame({col: _merged_column(df[col], upserts[col], order) for col in df.columns})
+    # Numéricas que viraram float no concat (NaN das linhas de delete no CSV do
+    # delta) voltam a int64 quando possível: mesma regra do spill, mais as
+    # colunas que já eram inteiras na tabela base
+    new = ingest.restore_dtypes(new)
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col].dtype) and new[col].dtype.kind == 'f':
+            values = new[col].to_numpy()
+            if not np.isnan(values).any() and (values == values.round()).all():
+                new[col] = values.astype(df[col].dtype)
+    removed = df.iloc[np.sort(np.r_[updated_pos, deleted_pos])]
+    return new, removed, upserts
+
+
+def _add(state: dict, counts: pd.Series, sign: int) -> None:
+    for group, c in counts.items():
+        total = state.get(group, 0) + sign * int(c)
+        if total:
+            state[group] = total
+        else:
+            state.pop(group, None)
+
+
+def _add_pairs(state: dict, counts: pd.Series, sign: int) -> None:
+    """Atualiza multiconjuntos grupo -> {valor: multiplicidade} a partir de contagens por (grupo, valor)."""
+    for (group, value), c in counts.items():
+        values = state.setdefault(group, {})
+        total = values.get(value, 0) + sign * int(c)
+        if total:
+            values[value] = total
+        else:
+            values.pop(value, None)
+            if not values:
+                del state[group]
+
+
+class MaintainedMetrics:
+    """Métricas (aggregations.Metric) por `key` mantidas por contadores.
+
+    `frame()` equivale a `group_metrics(tabela inteira, key, metrics)`. Com
+    `source`, cada linha entra uma vez por item da lista em `source` (como
+    no explode). O nunique de restaurant_id conta linhas, pois a atualização
+    por chave garante ids únicos; os demais nunique guardam multiconjuntos.
+    """
+
+    def __init__(self, key: str, metrics, source: str = None):
+        self.key = key
+        self.metrics = metrics
+        self.source = source
+        self.rows = {}
+        self.eligible = {m.name: {} for m in metrics}
+        self.values = {m.name: {} for m in metrics}
+        self.integer = {}
+        columns = {source or key, 'cuisines_list'}
+        for m in metrics:
+            columns.add(m.column)
+            conditions = m.where if isinstance(m.where, list) else [m.where]
+            columns.update(w if isinstance(w, str) else w[0] for w in conditions if w is not None)
+        self.columns = sorted(columns)
+
+    def _long(self, frame: pd.DataFrame) -> pd.DataFrame:
+        long = frame[self.columns].assign(_row=np.arange(len(frame)))
+        if self.source is None:
+            return long.assign(**{self.key: frame[self.key].astype(object)})
+        # Culinária repetida na mesma linha conta uma vez (como na tabela ponte do CuisineIndex)
+        return long.assign(**{self.key: frame[self.source]}).explode(self.key).drop_duplicates(['_row', self.key])
+
+    def apply(self, frame: pd.DataFrame, sign: int) -> None:
+        """Soma (sign=+1) ou desconta (sign=-1) as linhas de `frame`."""
+        if len(frame) == 0:
+            return
+        long = self._long(frame)
+        valid = long[self.key].notna().to_numpy()
+        _add(self.rows, long.loc[valid, self.key].value_counts(), sign)
+        for m in self.metrics:
+            sub = long.loc[valid & _where_mask(long, m.where)]
+            _add(self.eligible[m.name], sub[self.key].value_counts(), sign)
+            state = self.values[m.name]
+            if m.agg == 'nunique' and m.column == KEY_COLUMN:
+                pairs = sub.loc[sub[m.column].notna(), ['_row', self.key]].drop_duplicates()
+                _add(state, pairs[self.key].value_counts(), sign)
+            elif m.agg == 'nunique':
+                pairs = sub.loc[sub[m.column].notna()]
+                _add_pairs(state, pairs.groupby([self.key, m.column], observed=True).size(), sign)
+            elif m.agg == 'nunique_cuisine':
+                pairs = sub[[self.key, 'cuisines_list']].explode('cuisines_list').dropna()
+                _add_pairs(state, pairs.groupby([self.key, 'cuisines_list']).size(), sign)
+            elif m.agg in ('sum', 'mean'):
+                values = sub[m.column].astype(float)
+                ok = values.notna()
+                sums = values[ok].groupby(sub.loc[ok, self.key]).agg(['sum', 'count'])
+                for group, (total, count) in sums.iterrows():
+                    acc = state.setdefault(group, [0.0, 0])
+                    acc[0] += sign * total
+                    acc[1] += sign * int(count)
+                    if acc[1] == 0:
+                        # Sem valores: zera de verdade (sem resíduo de ponto flutuante)
+                        del state[group]
+            elif m.agg != 'count':
+                raise ValueError(f"Agregação desconhecida: {m.agg}")
+
+    def set_dtypes(self, df: pd.DataFrame) -> None:
+        """Somas de colunas inteiras saem inteiras, como no groupby."""
+        self.integer = {m.column: pd.api.types.is_integer_dtype(df[m.column].dtype)
+                        for m in self.metrics if m.agg == 'sum'}
+
+    def frame(self) -> pd.DataFrame:
+        groups = sorted(self.rows)
+        out = {}
+        for m in self.metrics:
+            eligible = np.array([self.eligible[m.name].get(g, 0) for g in groups], dtype=np.int64)
+            state = self.values[m.name]
+            if m.agg == 'count':
+                result = eligible
+            elif m.agg in ('nunique', 'nunique_cuisine'):
+                sizes = [state.get(g, 0) for g in groups]
+                result = np.array([len(v) if isinstance(v, dict) else v for v in sizes], dtype=np.int64)
+            else:
+                acc = np.array([state.get(g, (0.0, 0)) for g in groups], dtype=float).reshape(-1, 2)
+                if m.agg == 'sum':
+                    result = acc[:, 0].round().astype(np.int64) if self.integer.get(m.column) else acc[:, 0]
+                else:
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        result = np.where(acc[:, 1] > 0, acc[:, 0] / np.maximum(acc[:, 1], 1), np.nan)
+            if m.agg == 'nunique_cuisine':
+                out[m.name] = _absent_as_na(result, result > 0)
+            else:
+                out[m.name] = _absent_as_na(result, eligible > 0) if m.where is not None else result
+        return pd.DataFrame(out, index=pd.Index(groups, name=self.key, dtype=object))
+
+
+class Aggregates:
+    """Agregações mantidas da aba País (por país), Cidade (por cidade) e Tipos de Culinária (por culinária)."""
+
+    SPECS = {
+        'country': ('country', COUNTRY_METRICS, None),
+        'city': ('city', CITY_METRICS, None),
+        'cuisine': ('cuisine', CUISINE_METRICS, 'cuisines_list'),
+    }
+
+    def __init__(self, groups: dict):
+        self.groups = groups
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "Aggregates":
+        if not df[KEY_COLUMN].is_unique:
+            raise DeltaError("A tabela base tem restaurant_id repetido: não dá para atualizar por chave")
+        groups = {name: MaintainedMetrics(*spec) for name, spec in cls.SPECS.items()}
+        for g in groups.values():
+            g.apply(df, +1)
+            g.set_dtypes(df)
+        return cls(groups)
+
+    def updated(self, removed: pd.DataFrame, added: pd.DataFrame, df: pd.DataFrame) -> "Aggregates":
+        """Cópia atualizada (o estado é proporcional a grupos x valores, não a linhas)."""
+        new = copy.deepcopy(self)
+        for g in new.groups.values():
+            g.apply(removed, -1)
+            g.apply(added, +1)
+            g.set_dtypes(df)
+        return new
+
+    def frame(self, name: str) -> pd.DataFrame:
+        return self.groups[name].frame()
+
+
+def update(df: pd.DataFrame, aggregates: Aggregates, source):
+    """Lê o delta `source` e devolve (nova tabela, agregações atualizadas, resumo)."""
+    delta = read_delta(source)
+    new, removed, added = apply_delta(df, delta)
+    summary = {
+        'inseridos': int((delta.ops == 'insert').sum()),
+        'atualizados': int((delta.ops == 'update').sum()),
+        'removidos': len(delta.deletes),
+    }
+    return new, aggregates.updated(removed, added, new), summary
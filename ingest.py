@@ -0,0 +1,108 @@
+# ZF Restaurantes – Ingestão em blocos
+# -------------------------------------------------------------
+# Para CSVs maiores que a memória: lê o arquivo em blocos de linhas,
+# descarta cedo as colunas que o dashboard não usa (address,
+# locality_verbose, rating_color, ...), aplica prepare_dataframe em cada
+# bloco e grava o resultado num arquivo Arrow IPC (spill). O pico de
+# memória da ingestão fica limitado pelo tamanho do bloco; o arquivo
+# depois é lido memory-mapped como qualquer cache de disk_cache, mas o
+# DataFrame do dashboard é materializado inteiro (só com as colunas
+# usadas), então o carregamento completo continua O(linhas).
+# -------------------------------------------------------------
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+from data_prep import (
+    CATEGORY_COLUMNS,
+    COORD_COLUMNS,
+    DERIVED_COLUMNS,
+    FLAG_COLUMNS,
+    RENAME_MAP,
+    prepare_dataframe,
+)
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Marca gravada nos metadados do arquivo (tipos a restaurar na leitura)
+STREAM_METADATA_KEY = b"fz_stream"
+
+NUMERIC_COLUMNS = ['restaurant_id','average_cost_for_two','aggregate_rating','votes','price_range']
+
+
+def spill_schema(columns) -> pa.Schema:
+    """Esquema fixo do spill: o tipo não pode variar entre blocos.
+
+    Numéricas viram float64 (um bloco pode ter NaN e outro não) e as colunas
+    category viram texto (cada bloco teria seu próprio dicionário).
+    """
+    fields = []
+    for col in columns:
+        if col in NUMERIC_COLUMNS or col in COORD_COLUMNS:
+            fields.append(pa.field(col, pa.float64()))
+        elif col in FLAG_COLUMNS:
+            fields.append(pa.field(col, pa.bool_()))
+        else:
+            fields.append(pa.field(col, pa.large_string()))
+    return pa.schema(fields, metadata={STREAM_METADATA_KEY: b"1"})
+
+
+def _to_batch(df: pd.DataFrame, schema: pa.Schema) -> pa.RecordBatch:
+    arrays = []
+    for field in schema:
+        s = df[field.name]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype(object)
+        try:
+            arrays.append(pa.array(s, type=field.type, from_pandas=True))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            # Texto com valores não-str (ex.: números): converte, mantendo nulos
+            s = s.map(lambda v: v if pd.isna(v) or isinstance(v, str) else str(v))
+            arrays.append(pa.array(s, type=field.type, from_pandas=True))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_to_arrow(source, path: str, columns, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """Lê `source` (caminho ou arquivo) em blocos e grava `columns` preparadas em `path`.
+
+    Devolve o número de linhas gravadas. A gravação é atômica (arquivo
+    temporário + rename).
+    """
+    keep = set(columns)
+    schema = spill_schema([c for c in columns if c not in DERIVED_COLUMNS])
+    tmp = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    rows = 0
+    reader = pd.read_csv(source, chunksize=chunk_rows, usecols=lambda c: RENAME_MAP.get(c, c) in keep)
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for chunk in reader:
+                prepared = prepare_dataframe(chunk)
+                writer.write_batch(_to_batch(prepared, schema))
+                rows += len(prepared)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return rows
+
+
+def restore_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Devolve aos dados lidos de um spill os tipos do caminho em memória.
+
+    Texto de baixa cardinalidade volta a category (categorias ordenadas) e
+    numéricas sem NaN e sem parte fracionária voltam a int64.
+    """
+    for col in CATEGORY_COLUMNS + ['rating_text']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy()
+            if not pd.isna(values).any() and (values == values.round()).all():
+                df[col] = values.astype('int64')
+    return df
@@ -0,0 +1,87 @@
+# ZF Restaurantes – Memoização dos resultados por filtro
+# -------------------------------------------------------------
+# Os resultados das abas dependem só do dataset e da seleção da barra
+# lateral. Guardamos cada combinação já vista numa LRU limitada por
+# memória (bytes estimados), compartilhada entre sessões, para que voltar
+# a uma seleção anterior não recalcule nada.
+# -------------------------------------------------------------
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MEMO_MB_ENV = "FZ_MEMO_MB"
+DEFAULT_MEMO_MB = 256
+
+
+def filter_key(digest: str, schema: str, countries, cities, cuisines) -> str:
+    """Chave canônica (independe da ordem de seleção) de um dataset + filtro."""
+    spec = repr((digest, schema, sorted(countries), sorted(cities), sorted(cuisines)))
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+
+def estimate_bytes(obj) -> int:
+    """Tamanho aproximado de resultados (dicts/listas de Series, DataFrames e escalares)."""
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(estimate_bytes(k) + estimate_bytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def default_max_bytes() -> int:
+    return int(float(os.environ.get(MEMO_MB_ENV, DEFAULT_MEMO_MB)) * 2**20)
+
+
+class ResultCache:
+    """LRU thread-safe limitada pela soma dos tamanhos estimados das entradas.
+
+    Os valores são compartilhados: trate-os como somente leitura.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value) -> None:
+        size = estimate_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
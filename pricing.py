@@ -0,0 +1,92 @@
+# ZF Restaurantes – Preços em moeda única
+# -------------------------------------------------------------
+# O CSV traz `average_cost_for_two` na moeda local de cada país. No
+# carregamento (data_prep.add_derived_columns) ele é convertido para
+# dólar com uma tabela de câmbio offline, por lookup vetorizado nos
+# códigos da coluna categórica `currency`; todas as métricas de preço
+# das abas são calculadas sobre essa coluna (PRICE_COLUMN).
+#
+# Como médias são lineares, trocar a moeda de exibição só multiplica os
+# resultados já calculados (e guardados no memo) pela taxa de destino.
+# -------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMN = 'average_cost_for_two_usd'
+
+# Unidades da moeda por 1 dólar, com os rótulos de `currency` do CSV. São as
+# taxas implícitas em avg_cost_dollar_for_two de dataset/new_zomato.csv
+# (mediana de average_cost_for_two / avg_cost_dollar_for_two por moeda).
+RATES_PER_USD = {
+    'Dollar($)': 1.0,
+    'Brazilian Real(R$)': 5.4999,
+    'Pounds(£)': 0.7527,
+    'Indian Rupees(Rs.)': 87.6808,
+    'Indonesian Rupiah(IDR)': 16359.86,
+    'NewZealand($)': 1.6930,
+    'Botswana Pula(P)': 14.2900,
+    'Qatari Rial(QR)': 3.6470,
+    'Rand(R)': 17.9301,
+    'Sri Lankan Rupee(LKR)': 300.3003,
+    'Turkish Lira(TL)': 40.6805,
+    'Emirati Diram(AED)': 3.6710,
+}
+
+# Moedas de exibição: código -> rótulo em RATES_PER_USD
+TARGETS = {
+    'USD': 'Dollar($)',
+    'BRL': 'Brazilian Real(R$)',
+    'GBP': 'Pounds(£)',
+    'INR': 'Indian Rupees(Rs.)',
+    'IDR': 'Indonesian Rupiah(IDR)',
+    'NZD': 'NewZealand($)',
+    'BWP': 'Botswana Pula(P)',
+    'QAR': 'Qatari Rial(QR)',
+    'ZAR': 'Rand(R)',
+    'LKR': 'Sri Lankan Rupee(LKR)',
+    'TRY': 'Turkish Lira(TL)',
+    'AED': 'Emirati Diram(AED)',
+}
+
+DEFAULT_TARGET = 'USD'
+
+# Resultados de analytics.run_tabs que são preços (por aba)
+PRICE_RESULTS = {
+    "País": ['pais_preco_medio'],
+    "Cidade": ['cidade_preco_medio'],
+    "Restaurantes": ['booking_mean_price', 'japanese_mean_price', 'bbq_mean_price'],
+    "Tipos de Culinária": ['cuisine_price_mean'],
+}
+
+
+def usd_cost(cost: pd.Series, currency: pd.Series) -> pd.Series:
+    """`cost` em dólar; moedas fora de RATES_PER_USD (ou ausentes) viram NaN."""
+    currency = currency.astype('category')
+    # Uma taxa por categoria, espalhada pelas linhas via códigos (-1 = NaN cai na última posição)
+    lut = np.array([RATES_PER_USD.get(c, np.nan) for c in currency.cat.categories] + [np.nan])
+    rates = lut[currency.cat.codes.to_numpy()]
+    return pd.Series(cost.to_numpy(dtype=float) / rates, index=cost.index, name=PRICE_COLUMN)
+
+
+def unknown_currencies(currency: pd.Series) -> list:
+    """Moedas presentes em `currency` sem taxa na tabela (preços delas ficam fora das médias)."""
+    present = currency.astype('category').cat.remove_unused_categories().cat.categories
+    return sorted(c for c in present if c not in RATES_PER_USD)
+
+
+def rate(target: str) -> float:
+    """Unidades de `target` (código de TARGETS) por 1 dólar."""
+    return RATES_PER_USD[TARGETS[target]]
+
+
+def convert_results(results: dict, target: str) -> dict:
+    """Resultados das abas com os preços em `target` (os originais, em dólar, não são alterados)."""
+    if target == DEFAULT_TARGET:
+        return results
+    k = rate(target)
+    out = dict(results)
+    for tab, keys in PRICE_RESULTS.items():
+        if tab in out:
+            out[tab] = {**out[tab], **{key: out[tab][key] * k for key in keys}}
+    return out
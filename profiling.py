@@ -0,0 +1,163 @@
+# ZF Restaurantes – Instrumentação de tempo e memória
+# -------------------------------------------------------------
+# Mede, por bloco (ex.: cada aba), os bytes alocados (tracemalloc) e a
+# variação do RSS do processo. Desligado, `track` não faz nada.
+#
+# Profiler: tempo, chamadas e (opcional) variação de memória de cada
+# etapa do rerun (carga, preparo, filtro, cálculo e renderização de cada
+# aba), exportados como tabela, JSON ou linhas de log estruturadas.
+# -------------------------------------------------------------
+
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+def peak_rss_bytes() -> int:
+    """Pico de RSS do processo (ru_maxrss vem em KiB no Linux e em bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes() -> int:
+    """RSS atual (Linux, via /proc); fora do Linux, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+class MemoryProbe:
+    """Coleta alocações e variação do RSS por bloco nomeado.
+
+    O RSS é o atual antes/depois do bloco: o pico do processo (ru_maxrss) só
+    cresce e, depois do maior bloco, seria o mesmo para todos.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.records = []
+
+    @contextmanager
+    def track(self, label: str):
+        if not self.enabled:
+            yield
+            return
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        rss = current_rss_bytes()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.records.append({
+                "bloco": label,
+                "alocado_pico_mb": (peak - before) / 2**20,
+                "retido_mb": (current - before) / 2**20,
+                "rss_delta_mb": (current_rss_bytes() - rss) / 2**20,
+            })
+            if started:
+                tracemalloc.stop()
+
+
+class Profiler:
+    """Tempo e número de chamadas por etapa de um rerun (aninhadas viram "pai/filho").
+
+    Desligado, `stage` devolve um contexto vazio compartilhado: o custo é uma
+    chamada de método. Com `memory`, cada etapa registra também a variação do
+    RSS e dos bytes rastreados pelo tracemalloc (retidos ao fim da etapa); o
+    tracemalloc ligado pelo profiler é desligado em `close` (ou no fim do `with`).
+    """
+
+    _OFF = nullcontext()
+
+    def __init__(self, enabled: bool = False, memory: bool = False):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.stages = {}
+        self._path = []
+        # Como no MemoryProbe: só desliga o tracemalloc se foi ele quem ligou
+        self._started = self.memory and not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+
+    def close(self) -> None:
+        """Desliga o tracemalloc ligado por este profiler (os registros continuam disponíveis)."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+        self.memory = False
+
+    def __enter__(self) -> "Profiler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def stage(self, name: str):
+        return self._stage(name) if self.enabled else self._OFF
+
+    @contextmanager
+    def _stage(self, name: str):
+        self._path.append(name)
+        key = "/".join(self._path)
+        # Criada na entrada: a ordem das etapas é a de início (pai antes dos filhos)
+        entry = self._entry(key)
+        if self.memory:
+            rss, traced = current_rss_bytes(), tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            self._path.pop()
+            entry["segundos"] += seconds
+            entry["chamadas"] += 1
+            if self.memory:
+                entry["rss_delta_mb"] = entry.get("rss_delta_mb", 0.0) + (current_rss_bytes() - rss) / 2**20
+                entry["retido_mb"] = entry.get("retido_mb", 0.0) + (tracemalloc.get_traced_memory()[0] - traced) / 2**20
+
+    def add(self, name: str, seconds: float) -> None:
+        """Registra uma etapa medida fora do profiler (ex.: tempos por aba do run_tabs)."""
+        if not self.enabled:
+            return
+        entry = self._entry("/".join(self._path + [name]))
+        entry["segundos"] += seconds
+        entry["chamadas"] += 1
+
+    def _entry(self, key: str) -> dict:
+        if key not in self.stages:
+            self.stages[key] = {"etapa": key, "nivel": key.count("/"), "segundos": 0.0, "chamadas": 0}
+        return self.stages[key]
+
+    def records(self) -> list:
+        """Etapas na ordem em que começaram (pais antes dos filhos)."""
+        return list(self.stages.values())
+
+    def to_json(self, **meta) -> str:
+        return json.dumps({**meta, "etapas": self.records()}, ensure_ascii=False, indent=1)
+
+    def log(self, **meta) -> None:
+        """Uma linha de log JSON por etapa (logger LOGGER, nível INFO)."""
+        for record in self.records():
+            LOGGER.info(json.dumps({**meta, **record}, ensure_ascii=False))
+
+
+LOGGER = logging.getLogger("fz_restaurantes.profiling")
+
+
+def enable_logging() -> None:
+    """Mostra as linhas de LOGGER no stderr (uma vez por processo)."""
+    LOGGER.setLevel(logging.INFO)
+    if not LOGGER.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        LOGGER.addHandler(handler)
@@ -0,0 +1,116 @@
+# ZF Restaurantes – Relatórios sem interface
+# -------------------------------------------------------------
+# Calcula as respostas de todas as abas (analytics.run_tabs) para um
+# dataset e um filtro, sem Streamlit, e grava o resultado em JSON (um
+# arquivo com tudo) ou Parquet (uma tabela por ranking/série + JSON com
+# as respostas escalares). Usado pelo `cli.py report` para gerar, em
+# lote, os relatórios de vários datasets regionais.
+# -------------------------------------------------------------
+
+import json
+import math
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import disk_cache
+from analytics import TABS, filter_rows, run_tabs
+from cuisine_index import CuisineIndex
+from data_prep import schema_key
+from hierarchy import LocationIndex
+from pricing import DEFAULT_TARGET, convert_results
+
+# O mapa (clusters por zoom) é visualização, não resposta: fica fora do relatório
+REPORT_TABS = [tab for tab in TABS if tab != "Mapa"]
+
+SCALARS_FILE = "respostas.json"
+
+
+def build_report(df: pd.DataFrame, countries=None, cities=None, cuisines=None,
+                 workers: int = 1, digest: str = None, currency: str = DEFAULT_TARGET) -> dict:
+    """Respostas das abas para o recorte (None = sem filtro naquele nível, como no app), preços em `currency`."""
+    cidx = CuisineIndex.build(df['cuisines'])
+    loc = LocationIndex.build(df)
+    countries = loc.countries if countries is None else list(countries)
+    cities = loc.cities_for(countries) if cities is None else list(cities)
+    cuisines = list(cuisines or [])
+    rows = filter_rows(loc, cidx, countries, cities, cuisines)
+    results, seconds, total = run_tabs(df, rows, cidx, workers=workers, tabs=REPORT_TABS)
+    return {
+        'digest': digest,
+        'schema': schema_key(),
+        'linhas': len(df),
+        'linhas_filtradas': len(df) if rows is None else len(rows),
+        'filtros': {'paises': countries, 'cidades': cities, 'culinarias': cuisines},
+        'moeda': currency,
+        'abas': convert_results(results, currency),
+        'segundos': {**seconds, 'total': total},
+    }
+
+
+def load_report(csv_path: str, cache_dir: str = None, **kwargs) -> dict:
+    """Relatório de um CSV, lido pelo cache colunar em disco (o mesmo do app)."""
+    digest = disk_cache.file_digest(csv_path)
+    df, _ = disk_cache.load_prepared(csv_path, digest, cache_dir=cache_dir)
+    report = build_report(df, digest=digest, **kwargs)
+    report['dataset'] = csv_path
+    return report
+
+
+def jsonable(obj):
+    """Converte resultados (Series, DataFrames, escalares NumPy, NaN) em tipos JSON.
+
+    Series viram listas ordenadas de {rotulo, valor} (a ordem é o ranking).
+    """
+    if isinstance(obj, dict):
+        return {str(k): jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, pd.Series):
+        return [{'rotulo': jsonable(k), 'valor': jsonable(v)} for k, v in obj.items()]
+    if isinstance(obj, pd.DataFrame):
+        return [jsonable(r) for r in obj.reset_index().to_dict('records')]
+    if isinstance(obj, (list, tuple)):
+        return [jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if obj is pd.NA or (isinstance(obj, float) and math.isnan(obj)):
+        return None
+    return obj
+
+
+def write_json(report: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(jsonable(report), f, ensure_ascii=False, indent=1)
+    return path
+
+
+def _slug(name: str) -> str:
+    """Nome de diretório ASCII: acentos removidos ("País" -> "pais"), o resto vira "_"."""
+    folded = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^0-9a-z]+", "_", folded.lower()).strip("_")
+
+
+def write_parquet(report: dict, directory: str) -> list:
+    """Uma tabela Parquet por Series/DataFrame (<aba>/<chave>.parquet) + SCALARS_FILE com o resto."""
+    written = []
+    scalars = {k: v for k, v in report.items() if k != 'abas'}
+    scalars['abas'] = {}
+    for tab, results in report['abas'].items():
+        scalars['abas'][tab] = {}
+        for key, value in results.items():
+            if isinstance(value, (pd.Series, pd.DataFrame)):
+                table = value.to_frame() if isinstance(value, pd.Series) else value
+                # Parquet exige nomes de coluna texto; o índice vira coluna
+                table = table.reset_index()
+                table.columns = [str(c) for c in table.columns]
+                path = os.path.join(directory, _slug(tab), f"{key}.parquet")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                table.to_parquet(path, index=False)
+                written.append(path)
+            else:
+                scalars['abas'][tab][key] = value
+    written.append(write_json(scalars, os.path.join(directory, SCALARS_FILE)))
+    return written
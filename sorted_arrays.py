@@ -0,0 +1,44 @@
+# ZF Restaurantes – Operações sobre arrays de posições ordenadas
+# -------------------------------------------------------------
+# Os índices (LocationIndex, CuisineIndex, GridIndex) guardam posições de
+# linha em ordem crescente ou em faixas contíguas. Estas funções montam e
+# cruzam esses arrays com busca binária, sem máscaras do tamanho da
+# tabela; são compartilhadas por hierarchy, cuisine_index, geo, analytics
+# e app.
+# -------------------------------------------------------------
+
+import numpy as np
+
+
+def ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatena as faixas [starts[i], ends[i]) num único array de posições."""
+    lens = ends - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    # Cada posição = início da sua faixa + deslocamento dentro dela
+    offsets = np.repeat(starts - np.cumsum(np.r_[0, lens[:-1]]), lens)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+def isin_sorted(values: np.ndarray, sorted_rows: np.ndarray) -> np.ndarray:
+    """np.isin para `sorted_rows` já ordenado (busca binária, sem ordenar de novo)."""
+    if len(sorted_rows) == 0:
+        return np.zeros(len(values), dtype=bool)
+    idx = np.searchsorted(sorted_rows, values)
+    idx[idx == len(sorted_rows)] = 0
+    return sorted_rows[idx] == values
+
+
+def positions_in(labels: np.ndarray, postings: np.ndarray) -> np.ndarray:
+    """Posições em `labels` (rótulos em ordem crescente) que estão em `postings` (ordenado).
+
+    Busca binária do lado menor no maior: custo pelos tamanhos dos dois
+    arrays, sem máscara do tamanho da tabela.
+    """
+    if len(labels) <= len(postings):
+        return np.flatnonzero(isin_sorted(labels, postings))
+    at = np.searchsorted(labels, postings)
+    inside = at < len(labels)
+    at = at[inside]
+    return at[labels[at] == postings[inside]]
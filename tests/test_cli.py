@@ -0,0 +1,40 @@
+# ZF Restaurantes – Testes do `cli.py report`
+# -------------------------------------------------------------
+# Um CSV ruim no meio do lote conta como falha e não impede os
+# relatórios dos demais.
+#
+# Uso:
+#   python -m pytest -q tests
+# -------------------------------------------------------------
+
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import cli  # noqa: E402
+
+DATASET = os.path.join(ROOT, "dataset", "new_zomato.csv")
+
+
+@pytest.mark.parametrize("bad_content", ["", "a,b\n1,\"2\n"], ids=["vazio", "malformado"])
+def test_report_continues_after_bad_csv(tmp_path, capsys, bad_content):
+    bad = tmp_path / "ruim.csv"
+    bad.write_text(bad_content)
+    good = tmp_path / "bom.csv"
+    shutil.copy(DATASET, good)
+    out = tmp_path / "relatorios"
+
+    code = cli.main(["report", str(bad), str(good), "--out", str(out),
+                     "--cache-dir", str(tmp_path / "cache"), "--workers", "1"])
+
+    assert code == 1
+    assert str(bad) in capsys.readouterr().err
+    assert not (out / "ruim.json").exists()
+    with open(out / "bom.json", encoding="utf-8") as f:
+        assert json.load(f)['linhas'] > 0
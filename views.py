@@ -0,0 +1,43 @@
+# ZF Restaurantes – Projeções somente leitura do recorte filtrado
+# -------------------------------------------------------------
+# Em vez de copiar o DataFrame inteiro para cada aba, cada aba recebe só
+# as colunas que usa, nas linhas do filtro. Com copy-on-write ligado no
+# pandas, selecionar colunas não copia dados; só o recorte de linhas
+# (quando há filtro) materializa as colunas pedidas.
+# -------------------------------------------------------------
+
+import pandas as pd
+
+from pricing import PRICE_COLUMN
+
+# Colunas lidas por cada aba
+TAB_COLUMNS = {
+    "Geral": ['restaurant_id','country','city','votes'],
+    "País": [
+        'country','city','restaurant_id','price_range','votes','is_delivering_now',
+        'has_table_booking','aggregate_rating',PRICE_COLUMN,
+    ],
+    "Cidade": [
+        'city','restaurant_id','aggregate_rating',PRICE_COLUMN,
+        'has_table_booking','is_delivering_now','has_online_delivery',
+    ],
+    "Restaurantes": [
+        'restaurant_name','country','city','votes','aggregate_rating',PRICE_COLUMN,
+        'has_online_delivery','has_table_booking',
+    ],
+    "Tipos de Culinária": [
+        'restaurant_id','restaurant_name','country','city','aggregate_rating',
+        PRICE_COLUMN,'has_online_delivery','is_delivering_now',
+    ],
+    "Mapa": ['latitude','longitude','aggregate_rating'],
+}
+
+
+def project(df: pd.DataFrame, rows, columns) -> pd.DataFrame:
+    """Projeção de `columns` nas linhas `rows` (None = todas), preservando os rótulos do índice.
+
+    Trate o resultado como somente leitura: sem filtro ele compartilha os
+    buffers com `df` (copy-on-write).
+    """
+    sub = df[columns]
+    return sub if rows is None else sub.iloc[rows]